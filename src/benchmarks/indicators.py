@@ -0,0 +1,90 @@
+"""
+Per-run cost of the persisted technical indicator state against seeding from
+scratch, plus the consistency checks that make the shortcut safe.
+
+    cd src && python -m benchmarks.indicators --days 60
+
+Replays a synthetic price history one trading day at a time through
+strategy.technicals.load_technical_state, the way daily runs use it, and
+compares every snapshot with a cold TechnicalState seeded from the same frame.
+It also revises the latest bar (an intraday re-evaluation, then the close) and
+checks that the revision is picked up. Exits non-zero on any mismatch.
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+
+def mismatches(actual: dict, expected: dict, rel_tol: float = 1e-9) -> list[str]:
+    bad = []
+    for name, value in expected.items():
+        other = actual[name]
+        if isinstance(value, float):
+            if math.isnan(value) and math.isnan(other):
+                continue
+            if math.isclose(value, other, rel_tol=rel_tol, abs_tol=1e-12):
+                continue
+        elif value == other:
+            continue
+        bad.append(f"{name}: {other!r} != {value!r}")
+    return bad
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark and check the incremental technical indicators")
+    parser.add_argument("--start-date", default="2023-01-01")
+    parser.add_argument("--end-date", default="2025-04-05")
+    parser.add_argument("--days", type=int, default=60, help="逐日重放的交易日数")
+    args = parser.parse_args()
+
+    # 配置在模块导入时读取，必须在导入 strategy.technicals 之前设置
+    os.environ["QUANTAI_CACHE_DIR"] = tempfile.mkdtemp(prefix="quantai-indicators-")
+    os.environ.pop("QUANTAI_TECHNICAL_STATE", None)
+
+    from strategy.indicators import TechnicalState
+    from strategy.technicals import load_technical_state
+    from tools.api import price_frame_from_json
+    from tools.mock_server import SyntheticData
+
+    frame = price_frame_from_json(SyntheticData().prices("BENCH", args.start_date, args.end_date))
+    ticker = "BENCH"
+    failures = []
+    warm = cold = 0.0
+    first = len(frame) - args.days
+
+    load_technical_state(ticker, frame.iloc[:first])
+    for end in range(first + 1, len(frame) + 1):
+        window = frame.iloc[:end]
+        start = time.perf_counter()
+        incremental = load_technical_state(ticker, window).snapshot()
+        warm += time.perf_counter() - start
+        start = time.perf_counter()
+        expected = TechnicalState().seed(window).snapshot()
+        cold += time.perf_counter() - start
+        failures += [f"day {window['time'].iloc[-1]}: {m}" for m in mismatches(incremental, expected)]
+
+    # 最新一根 K 线先按盘中价格计算，再改成收盘价重算，结果须与从头计算一致
+    for label, factor in (("intraday", 1.0), ("revised close", 1.3)):
+        revised = frame.copy()
+        revised.iloc[-1, revised.columns.get_loc("close")] *= factor
+        revised.iloc[-1, revised.columns.get_loc("high")] = max(revised["high"].iloc[-1], revised["close"].iloc[-1])
+        incremental = load_technical_state(ticker, revised).snapshot()
+        expected = TechnicalState().seed(revised).snapshot()
+        failures += [f"{label}: {m}" for m in mismatches(incremental, expected)]
+
+    print(f"bars           {len(frame)} ({args.days} replayed)")
+    print(f"persisted      {warm / args.days * 1000:.3f} ms/run")
+    print(f"cold seed      {cold / args.days * 1000:.3f} ms/run")
+    print(f"speedup        {cold / warm:.1f}x")
+    print(f"checks         {'ok' if not failures else f'{len(failures)} mismatches'}")
+    for failure in failures[:20]:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
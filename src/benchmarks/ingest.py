@@ -0,0 +1,74 @@
+"""
+Throughput of the price ingest paths in rows/sec.
+
+    cd src && python -m benchmarks.ingest --rows 200000
+
+"validated" is the default path (json + PriceResponse), "trusted" is
+QUANTAI_TRUSTED_INGEST (orjson when installed + construct_rows).
+"""
+import argparse
+import json
+import random
+import time
+
+from data.models import Price, PriceResponse, construct_rows
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_payload(rows: int) -> bytes:
+    rnd = random.Random(0)
+    prices = []
+    close = 100.0
+    for i in range(rows):
+        close *= 1 + rnd.gauss(0, 0.02)
+        prices.append({
+            "open": round(close * (1 + rnd.gauss(0, 0.005)), 2),
+            "close": round(close, 2),
+            "high": round(close * 1.01, 2),
+            "low": round(close * 0.99, 2),
+            "volume": rnd.randint(10_000, 10_000_000),
+            "time": f"{2000 + i // 365:04d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}T00:00:00Z",
+        })
+    return json.dumps({"ticker": "BENCH", "prices": prices}).encode()
+
+
+def validated(payload: bytes) -> list[Price]:
+    return PriceResponse(**json.loads(payload)).prices
+
+
+def trusted(payload: bytes, sample_rate: float) -> list[Price]:
+    data = orjson.loads(payload) if orjson is not None else json.loads(payload)
+    return construct_rows(Price, data["prices"], sample_rate)
+
+
+def measure(func, rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark price ingest throughput")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+    base = measure(lambda: validated(payload), args.rows, args.repeat)
+    fast = measure(lambda: trusted(payload, args.sample_rate), args.rows, args.repeat)
+
+    print(f"rows: {args.rows}  payload: {len(payload) / 1e6:.1f} MB  orjson: {orjson is not None}")
+    print(f"validated: {base:>12,.0f} rows/sec")
+    print(f"trusted:   {fast:>12,.0f} rows/sec  ({fast / base:.1f}x, sample rate {args.sample_rate})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+End-to-end throughput and tail latency of main.py against tools.mock_server.
+
+    cd src && python -m benchmarks.pipeline --tickers 50 --latency-ms 50 --llm-latency-ms 800
+
+Starts the mock server in-process, points both API clients at it and runs
+analyze_ticker over synthetic tickers with run_universe. Caches, the price
+warehouse and incremental sync write to a throwaway directory, so every run
+starts cold and measures the network path.
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from tools.mock_server import MockAPIServer
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the full pipeline against the local mock API")
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--ticker-workers", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=0, help="计算部分使用的工作进程数，0 表示只用线程")
+    parser.add_argument("--start-date", default="2025-01-01")
+    parser.add_argument("--end-date", default="2025-04-05")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="服务端每秒请求上限，0 表示不限")
+    parser.add_argument("--client-rate", type=float, default=0.0, help="客户端令牌桶速率 QUANTAI_API_RATE，0 表示不限")
+    args = parser.parse_args()
+
+    server = MockAPIServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, llm_latency_ms=args.llm_latency_ms,
+                           error_rate=args.error_rate, rate_limit=args.rate_limit).start()
+    # 配置在模块导入时读取，必须在导入 main 之前设置
+    os.environ.update({
+        "FINANCIAL_DATASETS_BASE_URL": server.url,
+        "DEEPSEEK_BASE_URL": server.url,
+        "QUANTAI_CACHE_DIR": tempfile.mkdtemp(prefix="quantai-bench-"),
+        "QUANTAI_API_RATE": str(args.client_rate),
+    })
+    os.environ.setdefault("FINANCIAL_DATASETS_API_KEY", "mock")
+    os.environ.setdefault("DEEPSEEK_API_KEY", "mock")
+
+    import main as pipeline
+    from tools.pipeline import create_process_pool
+    from tools.rate_limit import api_rate_limiter
+    from tools.sink import ResultSink
+    from tools.universe import run_universe
+
+    latencies = []
+    precomputed = {}
+    pool = create_process_pool(args.processes) if args.processes > 0 else None
+
+    def analyze(ticker: str) -> dict:
+        start = time.perf_counter()
+        try:
+            return pipeline.analyze_ticker(ticker, args.start_date, args.end_date, pool=pool,
+                                           precomputed=precomputed.pop(ticker, None))
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    tickers = [f"MOCK{i:04d}" for i in range(args.tickers)]
+    out = io.StringIO()
+    start = time.perf_counter()
+    try:
+        run_universe(pipeline.prefetch_in_batches(tickers, args.start_date, args.end_date, precomputed=precomputed),
+                     analyze, ResultSink(out).emit, max_workers=args.ticker_workers)
+    finally:
+        elapsed = time.perf_counter() - start
+        server.stop()
+        if pool is not None:
+            pool.shutdown()
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    failed = sum(1 for result in results if result.get("error") or result.get("errors"))
+    print(f"tickers        {len(results)} ({failed} with errors) in {elapsed:.2f}s")
+    print(f"throughput     {len(results) / elapsed:.2f} tickers/sec")
+    for q in (0.5, 0.95, 0.99):
+        print(f"p{int(q * 100):<13} {percentile(latencies, q):.3f}s")
+    print(f"server         {json.dumps(server.stats())}")
+    print(f"rate limiter   {json.dumps(api_rate_limiter.stats())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
+import random
+from typing import Any, Callable, Literal
+
+import numpy as np
 from pydantic import BaseModel
 
+from utils.ProgressBar import TaskName
+
 
 class Price(BaseModel):
     open: float
@@ -79,6 +85,159 @@ class LineItemResponse(BaseModel):
     search_results: list[LineItem]
 
 
+class FinancialDataset:
+    """
+    Columnar store for line items: a (fields x periods) float64 array with a
+    validity mask, built once from the API rows. Periods keep the API order
+    (newest first).
+
+    Slicing by period (dataset[:5]) and selecting fields (select([...])) return
+    views that share the arrays. column() is an O(1) NumPy view, values() gives
+    the present values of one field as a list. Indexing or iterating yields
+    lightweight rows with the same attribute access as LineItem, so code that
+    walks rows keeps working.
+    """
+
+    META_FIELDS = ("ticker", "report_period", "period", "currency")
+
+    def __init__(self, data: np.ndarray, mask: np.ndarray, field_index: dict[str, int],
+                 meta: dict[str, list], integer_fields: set[str], start: int = 0, stop: int | None = None):
+        self._data = data
+        self._mask = mask
+        self._field_index = field_index
+        self._meta = meta
+        self._integer_fields = integer_fields
+        self._start = start
+        self._stop = data.shape[1] if stop is None else stop
+
+    @classmethod
+    def from_line_items(cls, items: list[LineItem]) -> "FinancialDataset":
+        field_index: dict[str, int] = {}
+        for item in items:
+            for name in (item.model_extra or {}):
+                field_index.setdefault(name, len(field_index))
+
+        data = np.full((len(field_index), len(items)), np.nan)
+        mask = np.zeros((len(field_index), len(items)), dtype=bool)
+        non_integer = set()
+        for j, item in enumerate(items):
+            for name, value in (item.model_extra or {}).items():
+                if value is None:
+                    continue
+                row = field_index[name]
+                data[row, j] = value
+                mask[row, j] = True
+                if not isinstance(value, int) or isinstance(value, bool):
+                    non_integer.add(name)
+
+        meta = {name: [getattr(item, name) for item in items] for name in cls.META_FIELDS}
+        return cls(data, mask, field_index, meta, set(field_index) - non_integer)
+
+    def _view(self, field_index: dict[str, int], start: int, stop: int) -> "FinancialDataset":
+        return FinancialDataset(self._data, self._mask, field_index, self._meta, self._integer_fields, start, stop)
+
+    @property
+    def fields(self) -> list[str]:
+        return list(self._field_index)
+
+    def select(self, fields: list[str]) -> "FinancialDataset":
+        """View restricted to the given fields (those not in the data are dropped)."""
+        field_index = {name: self._field_index[name] for name in fields if name in self._field_index}
+        return self._view(field_index, self._start, self._stop)
+
+    def head(self, n: int) -> "FinancialDataset":
+        return self[:n]
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one field across periods, NaN where the value is missing."""
+        view = self._data[self._field_index[name], self._start:self._stop]
+        view.flags.writeable = False
+        return view
+
+    def values(self, name: str, nonzero: bool = False) -> list:
+        """
+        Present values of a field in period order, i.e.
+        [item.name for item in items if item.name is not None]
+        (or `if item.name` when nonzero=True). Unknown fields give [].
+        """
+        row = self._field_index.get(name)
+        if row is None:
+            return []
+        column = self._data[row, self._start:self._stop]
+        valid = self._mask[row, self._start:self._stop]
+        if nonzero:
+            valid = valid & (column != 0)
+        present = column[valid]
+        if name in self._integer_fields:
+            return present.astype(np.int64).tolist()
+        return present.tolist()
+
+    def get(self, index: int, name: str):
+        if name in self._meta:
+            return self._meta[name][self._start + index]
+        row = self._field_index.get(name)
+        if row is None:
+            raise AttributeError(name)
+        position = self._start + index
+        if not self._mask[row, position]:
+            return None
+        value = self._data[row, position].item()
+        return int(value) if name in self._integer_fields else value
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self._view(self._field_index, self._start + start, self._start + max(start, stop))
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("FinancialDataset index out of range")
+        return FinancialRow(self, key)
+
+    def __iter__(self):
+        return (FinancialRow(self, i) for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"FinancialDataset(periods={len(self)}, fields={self.fields})"
+
+
+class FinancialRow:
+    """One period of a FinancialDataset with LineItem-style attribute access."""
+
+    __slots__ = ("_dataset", "_index")
+
+    def __init__(self, dataset: FinancialDataset, index: int):
+        self._dataset = dataset
+        self._index = index
+
+    def __getattr__(self, name: str):
+        return self._dataset.get(self._index, name)
+
+    def model_dump(self) -> dict:
+        names = list(FinancialDataset.META_FIELDS) + self._dataset.fields
+        return {name: self._dataset.get(self._index, name) for name in names}
+
+    def __repr__(self) -> str:
+        return f"FinancialRow({self.model_dump()})"
+
+
+class LineItemRequirement(BaseModel):
+    """
+    The line items one agent needs (declared as LINE_ITEMS in its strategy
+    module): fields, period and how many periods, newest first. tools.pipeline
+    merges the requirements of all agents into one request per period
+    (tools.api.plan_line_item_requests) and hands each agent its own slice.
+    """
+    line_items: list[str]
+    period: str = "ttm"
+    limit: int = 10
+
+
 class InsiderTrade(BaseModel):
     ticker: str
     issuer: str | None
@@ -113,6 +272,38 @@ class CompanyNewsResponse(BaseModel):
     news: list[CompanyNews]
 
 
+class AgentInput(BaseModel):
+    """
+    One positional argument of an agent: the dataset it comes from and how much
+    of it. `limit` keeps the newest rows (None: everything fetched); for
+    "metrics" it also sets how many periods are fetched, and "line_items"
+    takes its fields, period and limit from `line_items`. "ticker" is the
+    symbol itself and needs no request.
+    """
+    dataset: Literal["metrics", "line_items", "insider_trades", "company_news", "market_cap", "prices", "price_frame",
+                     "ticker"]
+    period: str = "ttm"
+    limit: int | None = None
+    line_items: LineItemRequirement | None = None
+
+
+class AgentSpec(BaseModel):
+    """
+    Declaration of one analysis agent, exported as AGENT by its strategy module.
+    tools.pipeline discovers every AGENT, fetches the datasets named by
+    `inputs` and schedules `run` as soon as all of them are ready. With `llm`
+    set, `run` returns (analysis_data, intro_text, prompt) and the signal comes
+    from DeepSeek; otherwise `run` returns the signal itself.
+    """
+    model_config = {"arbitrary_types_allowed": True}
+
+    name: str
+    task: TaskName
+    run: Callable[..., Any]
+    inputs: list[AgentInput]
+    llm: bool = False
+
+
 class Position(BaseModel):
     cash: float = 0.0
     shares: int = 0
@@ -147,3 +338,38 @@ class AgentStateData(BaseModel):
 class AgentStateMetadata(BaseModel):
     show_reasoning: bool = False
     model_config = {"extra": "allow"}
+
+
+def construct_rows(model: type[BaseModel], rows: list[dict], sample_rate: float = 0.01) -> list:
+    """
+    Trusted-ingest path for bulk payloads. The first row and a random
+    `sample_rate` fraction are fully validated, so a schema change still raises
+    a ValidationError; the rest are built like model_construct (defaults filled
+    in, no per-field validation or coercion) without its per-row overhead,
+    which in pydantic 2 costs more than validating.
+    """
+    names = set(model.model_fields)
+    defaults = {name: field.default for name, field in model.model_fields.items() if not field.is_required()}
+    allow_extra = model.model_config.get("extra") == "allow"
+    sampled = {0, *random.sample(range(len(rows)), int(len(rows) * sample_rate))} if rows else set()
+    new, set_attr = object.__new__, object.__setattr__
+
+    result = []
+    for index, row in enumerate(rows):
+        if index in sampled:
+            result.append(model.model_validate(row))
+            continue
+
+        if row.keys() <= names:
+            fields, extra = row, {}
+        else:
+            fields = {name: value for name, value in row.items() if name in names}
+            extra = {name: value for name, value in row.items() if name not in names}
+
+        instance = new(model)
+        set_attr(instance, "__dict__", {**defaults, **fields} if defaults else fields)
+        set_attr(instance, "__pydantic_fields_set__", set(fields))
+        set_attr(instance, "__pydantic_extra__", extra if allow_extra else None)
+        set_attr(instance, "__pydantic_private__", None)
+        result.append(instance)
+    return result
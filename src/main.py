@@ -1,266 +1,135 @@
-import json
+import argparse
+import itertools
+import sys
 
 from dotenv import load_dotenv
 
-from strategy.ben_graham import ben_graham
-from strategy.cathie_wood import cathie_wood
-from strategy.charlie_munger import charlie_munger
-from strategy.fundamentals import fundamentals
-from strategy.phil_fisher import phil_fisher
-from strategy.sentiment import sentiment
-from strategy.stanley_druckenmiller import stanley_druckenmiller
-from strategy.technicals import technical_analyst
-from strategy.bill_ackman import bill_ackman
-from strategy.valuation import valuation
-from strategy.warren_buffett import warren_buffett
 from tools.api import *
+from tools.cassette import cassette
+from tools.journal import run_journal
+from tools.pipeline import (PROCESS_WORKERS, create_process_pool, line_item_requirements, load_agents, run_pipeline,
+                            run_technical_panel, select_agents)
+from tools.sink import ResultSink, open_sink
+from tools.universe import load_tickers, run_universe, TICKER_CONCURRENCY
 
 from utils.ProgressBar import progress, ProgressStatus, TaskName
 import datetime
 
-from utils.constants import TEMPLATE
 
+def analyze_ticker(ticker: str, start_date: str, end_date: str, agents: list[str] | None = None, pool=None,
+                   sink: ResultSink | None = None, precomputed: dict | None = None) -> dict:
+    """
+    Run the declared agents (all of them by default) on one ticker; see
+    tools.pipeline. With a `sink`, every agent's result is emitted as its own
+    record the moment that agent finishes. `precomputed` holds results already
+    produced for this ticker by a batch stage (see prefetch_in_batches).
+    """
+    def on_result(name, result, error):
+        record = {"type": "agent", "ticker": ticker, "end_date": end_date, "agent": name}
+        record.update({"signal": result} if error is None else {"error": str(error)})
+        sink.emit(record)
+
+    response, errors = run_pipeline(ticker, start_date, end_date, select_agents(agents), pool=pool,
+                                    on_result=on_result if sink is not None else None, precomputed=precomputed)
+    return {
+        "type": "ticker",
+        "ticker": ticker,
+        "end_date": end_date,
+        "signals": response,
+        "errors": {name: str(error) for name, error in errors.items()},
+    }
+
+
+def prefetch_in_batches(tickers, start_date: str, end_date: str, batch_size: int = LINE_ITEM_BATCH_SIZE,
+                        agents: list[str] | None = None, precomputed: dict[str, dict] | None = None):
+    """
+    Hand out tickers a batch at a time, fetching each batch's line items in bulk
+    first. With `precomputed`, technical_analyst (when selected) also runs once
+    for the whole batch, and its results are stored there per ticker for
+    analyze_ticker to pick up.
+    """
+    selected = select_agents(agents)
+    # 与 run_pipeline 一致，按全部策略合并请求，只预取所选策略用到的 period
+    periods = {requirement.period for requirement in line_item_requirements(selected).values()}
+    requirements = {name: requirement for name, requirement in line_item_requirements(load_agents()).items()
+                    if requirement.period in periods}
+    technical_panel = precomputed is not None and "technical_analyst" in selected
+    tickers = iter(tickers)
+    while batch := list(itertools.islice(tickers, batch_size)):
+        # 续跑时已有断点的股票通常不缺财务科目，不再批量预取
+        missing = [t for t in batch if not (run_journal.enabled and run_journal.has_entries(t, end_date))]
+        try:
+            if missing:
+                prefetch_line_items(missing, end_date, requirements)
+        except Exception as e:
+            # 批量请求失败不影响分析，各股票会在 run_pipeline 中单独获取
+            progress.update(TaskName.UNIVERSE, ProgressStatus.WORKING, f"批量获取财务科目失败: {e}")
+        try:
+            # 只有一只股票时整批计算没有好处，逐只计算还能复用保存的增量指标状态
+            if technical_panel and len(missing) > 1:
+                for ticker, result in run_technical_panel(missing, start_date, end_date).items():
+                    precomputed.setdefault(ticker, {})["technical_analyst"] = result
+        except Exception as e:
+            # 批量计算失败时各股票照常单独计算
+            progress.update(TaskName.UNIVERSE, ProgressStatus.WORKING, f"批量技术分析失败: {e}")
+        yield from batch
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="QuantAI 多策略分析")
+    parser.add_argument("--tickers", default=None, help="逗号分隔的股票代码，如 NVDA,AAPL")
+    parser.add_argument("--tickers-file", default=None, help="股票池文件，每行一个代码")
+    parser.add_argument("--start-date", default="2025-01-01")
+    parser.add_argument("--end-date", default="2025-04-05")
+    parser.add_argument("--ticker-workers", type=int, default=TICKER_CONCURRENCY, help="同时分析的股票数量")
+    parser.add_argument("--processes", type=int, default=PROCESS_WORKERS,
+                        help="在多少个工作进程中执行各策略的计算部分，0 表示只用线程")
+    parser.add_argument("--output", default=None,
+                        help="JSON lines 输出位置：文件路径、tcp://host:port 或 unix:/path，默认输出到标准输出")
+    parser.add_argument("--aggregate", action="store_true", help="结束时额外输出一条包含全部结果的汇总记录")
+    parser.add_argument("--agents", default=None, help="逗号分隔的策略名，只获取这些策略需要的数据；默认全部")
+    parser.add_argument("--resume", action="store_true",
+                        help="启用运行日志：记录已获取的数据和已完成的策略结果，重跑时从断点继续")
+    parser.add_argument("--record", default=None, metavar="CASSETTE", help="把所有 API 请求与响应录制到该文件")
+    parser.add_argument("--replay", default=None, metavar="CASSETTE", help="从录制文件回放，不访问网络")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    agents = args.agents.split(",") if args.agents else None
+    if args.resume:
+        run_journal.enabled = True
+    if args.record or args.replay:
+        cassette.use("record" if args.record else "replay", args.record or args.replay)
+
+    # 未指定股票池时默认只分析 NVDA
+    ticker_list = args.tickers if args.tickers or args.tickers_file else "NVDA"
+    # 批量阶段算出的结果，按股票取走后即释放
+    precomputed = {}
+    tickers = prefetch_in_batches(load_tickers(ticker_list, args.tickers_file), args.start_date, args.end_date,
+                                  agents=agents, precomputed=precomputed)
+    pool = create_process_pool(args.processes) if args.processes > 0 else None
+    sink = open_sink(args.output)
+    # 汇总会把所有结果留在内存里，只在需要时收集
+    aggregate = {} if args.aggregate else None
+
+    def analyze(ticker: str) -> dict:
+        result = analyze_ticker(ticker, args.start_date, args.end_date, agents, pool=pool, sink=sink,
+                                precomputed=precomputed.pop(ticker, None))
+        if aggregate is not None:
+            aggregate[ticker] = {"signals": result["signals"], "errors": result["errors"]}
+        # 各策略的结果已逐条输出，这里只输出该股票的完成记录
+        return {key: value for key, value in result.items() if key != "signals"}
 
-def main():
-    ticker = "NVDA"
-    start_date = "2025-01-01"
-    end_date = "2025-04-05"
-    progress.update(TaskName.PREPARE_DATA, ProgressStatus.WORKING, "获取数据开始")
-    metrics_annual_10 = get_financial_metrics(ticker, end_date, period="annual", limit=10)
-    metrics_ttm_limit_10 = get_financial_metrics(
-        ticker=ticker,
-        end_date=end_date,
-        period="ttm",
-        limit=10,
-    )
-
-    financial_line_items1 = search_line_items(ticker, ["earnings_per_share",
-                                                       "revenue", "net_income",
-                                                       "book_value_per_share",
-                                                       "total_assets",
-                                                       "total_liabilities",
-                                                       "current_assets",
-                                                       "current_liabilities",
-                                                       "dividends_and_other_cash_distributions",
-                                                       "outstanding_shares"], end_date, period="annual", limit=10)
-    financial_line_items2 = search_line_items(
-        ticker,
-        [
-            "revenue",
-            "operating_margin",
-            "debt_to_equity",
-            "free_cash_flow",
-            "total_assets",
-            "total_liabilities",
-            "dividends_and_other_cash_distributions",
-            "outstanding_shares"
-        ],
-        end_date,
-        period="annual",  # or "ttm" if you prefer trailing 12 months
-        limit=5  # fetch up to 5 annual periods (or more if needed)
-    )
-
-    financial_line_items3 = search_line_items(ticker, [
-        "revenue",
-        "gross_margin",
-        "operating_margin",
-        "debt_to_equity",
-        "free_cash_flow",
-        "total_assets",
-        "total_liabilities",
-        "dividends_and_other_cash_distributions",
-        "outstanding_shares",
-        "research_and_development",
-        "capital_expenditure",
-        "operating_expense",
-
-    ], end_date, period="annual", limit=5)
-
-    financial_line_items4 = search_line_items(
-        ticker,
-        [
-            "revenue",
-            "net_income",
-            "operating_income",
-            "return_on_invested_capital",
-            "gross_margin",
-            "operating_margin",
-            "free_cash_flow",
-            "capital_expenditure",
-            "cash_and_equivalents",
-            "total_debt",
-            "shareholders_equity",
-            "outstanding_shares",
-            "research_and_development",
-            "goodwill_and_intangible_assets",
-        ],
-        end_date,
-        period="annual",
-        limit=10  # Munger examines long-term trends
-    )
-
-    financial_line_items5 = search_line_items(
-        ticker,
-        [
-            "revenue",
-            "net_income",
-            "earnings_per_share",
-            "free_cash_flow",
-            "research_and_development",
-            "operating_income",
-            "operating_margin",
-            "gross_margin",
-            "total_debt",
-            "shareholders_equity",
-            "cash_and_equivalents",
-            "ebit",
-            "ebitda",
-        ],
-        end_date,
-        period="annual",
-        limit=5,
-    )
-
-    financial_line_items6 = search_line_items(
-        ticker,
-        [
-            "revenue",
-            "earnings_per_share",
-            "net_income",
-            "operating_income",
-            "gross_margin",
-            "operating_margin",
-            "free_cash_flow",
-            "capital_expenditure",
-            "cash_and_equivalents",
-            "total_debt",
-            "shareholders_equity",
-            "outstanding_shares",
-            "ebit",
-            "ebitda",
-        ],
-        end_date,
-        period="annual",
-        limit=5,
-    )
-
-    financial_line_items7 = search_line_items(
-        ticker=ticker,
-        line_items=[
-            "free_cash_flow",
-            "net_income",
-            "depreciation_and_amortization",
-            "capital_expenditure",
-            "working_capital",
-        ],
-        end_date=end_date,
-        period="ttm",
-        limit=2,
-    )
-
-    financial_line_items8 = search_line_items(
-        ticker,
-        [
-            "capital_expenditure",
-            "depreciation_and_amortization",
-            "net_income",
-            "outstanding_shares",
-            "total_assets",
-            "total_liabilities",
-            "dividends_and_other_cash_distributions",
-            "issuance_or_purchase_of_equity_shares",
-        ],
-        end_date,
-    )
-
-    insider_trades = get_insider_trades(
-        ticker=ticker,
-        end_date=end_date,
-        limit=1000,
-    )
-
-    company_news = get_company_news(ticker, end_date, start_date=None)
-    market_cap = get_market_cap(ticker, end_date)
-    prices = get_prices(ticker, start_date=start_date, end_date=end_date)
-
-    progress.update(TaskName.PREPARE_DATA, ProgressStatus.DONE, "数据获取完成")
-
-    response = {}
-    # 1 本·格雷厄姆策略
-    progress.update(TaskName.BEN_GRAHAM, ProgressStatus.WORKING, TaskName.BEN_GRAHAM.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = ben_graham(metrics_annual_10, financial_line_items1, market_cap)
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["ben_graham"] = call_deepseek(prompt, message)
-    progress.update(TaskName.BEN_GRAHAM, ProgressStatus.DONE, TaskName.BEN_GRAHAM.chinese + "分析 完成")
-
-    # 2 比尔·阿克曼策略
-    progress.update(TaskName.BILL_ACKMAN, ProgressStatus.WORKING, TaskName.BILL_ACKMAN.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = bill_ackman(metrics_annual_10[:5], financial_line_items2, market_cap)
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["bill_ackman"] = call_deepseek(prompt, message)
-    progress.update(TaskName.BILL_ACKMAN, ProgressStatus.DONE, TaskName.BILL_ACKMAN.chinese + "分析 完成")
-
-    # 3 凯茜·伍德策略
-    progress.update(TaskName.CATHIE_WOOD, ProgressStatus.WORKING, TaskName.CATHIE_WOOD.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = cathie_wood(metrics_annual_10[:5], financial_line_items3, market_cap)
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["cathie_wood"] = call_deepseek(prompt, message)
-    progress.update(TaskName.CATHIE_WOOD, ProgressStatus.DONE, TaskName.CATHIE_WOOD.chinese + "分析 结束")
-
-    # 4 查理·芒格策略
-    progress.update(TaskName.CHARLIE_MUNGER, ProgressStatus.WORKING, TaskName.CHARLIE_MUNGER.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = charlie_munger(metrics_annual_10, financial_line_items4, insider_trades[:100],
-                                                       market_cap, company_news[:100])
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["charlie_munger"] = call_deepseek(prompt, message)
-    progress.update(TaskName.CHARLIE_MUNGER, ProgressStatus.DONE, TaskName.CHARLIE_MUNGER.chinese + "分析 结束")
-
-    # 5 最近的历史基本面分析
-    progress.update(TaskName.FUNDAMENTALS, ProgressStatus.WORKING, TaskName.FUNDAMENTALS.chinese + "分析 开始")
-    response["fundamentals"] = fundamentals(metrics_ttm_limit_10)
-    progress.update(TaskName.FUNDAMENTALS, ProgressStatus.DONE, TaskName.FUNDAMENTALS.chinese + "分析 结束")
-
-    # 6 菲尔·费舍尔策略
-    progress.update(TaskName.PHIL_FISHER, ProgressStatus.WORKING, TaskName.PHIL_FISHER.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = phil_fisher(financial_line_items5, market_cap, insider_trades[:50],
-                                                    company_news[:50])
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["phil_fisher"] = call_deepseek(prompt, message)
-    progress.update(TaskName.PHIL_FISHER, ProgressStatus.DONE, TaskName.PHIL_FISHER.chinese + "分析 结束")
-
-    # 7 新闻情绪分析
-    progress.update(TaskName.SENTIMENT, ProgressStatus.WORKING, TaskName.SENTIMENT.chinese + "分析 开始")
-    response["sentiment"] = sentiment(insider_trades, company_news)
-    progress.update(TaskName.SENTIMENT, ProgressStatus.DONE, TaskName.SENTIMENT.chinese + "分析 结束")
-
-    # 8 德鲁肯米勒策略
-    progress.update(TaskName.STANLEY_DRUCKENMILLER, ProgressStatus.WORKING,
-                    TaskName.STANLEY_DRUCKENMILLER.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = stanley_druckenmiller(prices, financial_line_items6, company_news[:50],
-                                                              insider_trades[:50], market_cap)
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["stanley_druckenmiller"] = call_deepseek(prompt, message)
-    progress.update(TaskName.STANLEY_DRUCKENMILLER, ProgressStatus.DONE, TaskName.STANLEY_DRUCKENMILLER.chinese + "分析 结束")
-
-    # 9 技术分析
-    progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING,
-                    TaskName.TECHNICAL_ANALYST.chinese + "分析 开始")
-    response["technical_analyst"] = technical_analyst(prices)
-    progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.DONE, TaskName.TECHNICAL_ANALYST.chinese + "分析 结束")
-
-    # 10 DCF策略&巴菲特策略
-    progress.update(TaskName.VALUATION, ProgressStatus.WORKING, TaskName.VALUATION.chinese + "分析 开始")
-    response["valuation"] = valuation(metrics_ttm_limit_10, financial_line_items7, market_cap)
-    progress.update(TaskName.VALUATION, ProgressStatus.DONE, TaskName.VALUATION.chinese + "分析 结束")
-
-    # 11 巴菲特策略
-    progress.update(TaskName.WARREN_BUFFETT, ProgressStatus.WORKING, TaskName.WARREN_BUFFETT.chinese + "分析 开始")
-    analysis_data, intro_text, prompt = warren_buffett(metrics_ttm_limit_10[:5], financial_line_items8, market_cap)
-    message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
-    response["warren_buffett"] = call_deepseek(prompt, message)
-    progress.update(TaskName.WARREN_BUFFETT, ProgressStatus.DONE, TaskName.WARREN_BUFFETT.chinese + "分析 结束")
-
-    print(json.dumps(response, indent=4, ensure_ascii=False))
+    try:
+        run_universe(tickers, analyze, sink.emit, max_workers=args.ticker_workers)
+        if aggregate is not None:
+            sink.emit({"type": "aggregate", "end_date": args.end_date, "results": aggregate})
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        sink.close()
 
 
 if __name__ == '__main__':
@@ -268,11 +137,8 @@ if __name__ == '__main__':
     progress.start()  # 启动进度条（或类似的可视化输出）
 
     try:
-
-        # market_cap = get_market_cap("NVDA", "2025-04-05")
-        # print(market_cap)
         main()  # 执行主逻辑
     except Exception as e:
-        print(f"Error: {e}")  # 捕获并打印异常
+        print(f"Error: {e}", file=sys.stderr)  # 捕获并打印异常，不混入 stdout 上的结果
     finally:
         progress.stop()  # 无论是否报错都停止进度显示
@@ -1,4 +1,6 @@
 import math
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset, FinancialMetrics
+from utils.ProgressBar import TaskName
 
 description = """Analyzes stocks using Benjamin Graham's classic value-investing principles:
     1. Earnings stability over multiple years.
@@ -34,7 +36,25 @@ description = """Analyzes stocks using Benjamin Graham's classic value-investing
     帮助投资者做出明智的投资决策。"""
 
 
-def ben_graham(metrics, financial_line_items, market_cap):
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "earnings_per_share",
+        "revenue",
+        "net_income",
+        "book_value_per_share",
+        "total_assets",
+        "total_liabilities",
+        "current_assets",
+        "current_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+    ],
+    period="annual",
+    limit=10,
+)
+
+
+def ben_graham(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, market_cap):
     # Perform sub-analyses
     earnings_analysis = analyze_earnings_stability(metrics, financial_line_items)
 
@@ -73,7 +93,7 @@ def ben_graham(metrics, financial_line_items, market_cap):
     return analysis_data, intro_text, prompt
 
 
-def analyze_earnings_stability(metrics: list, financial_line_items: list) -> dict:
+def analyze_earnings_stability(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Graham wants at least several years of consistently positive earnings (ideally 5+).
     We'll check:
@@ -117,7 +137,7 @@ def analyze_earnings_stability(metrics: list, financial_line_items: list) -> dic
     return {"score": score, "details": "; ".join(details)}
 
 
-def analyze_financial_strength(metrics: list, financial_line_items: list) -> dict:
+def analyze_financial_strength(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Graham checks liquidity (current ratio >= 2), manageable debt,
     and dividend record (preferably some history of dividends).
@@ -163,8 +183,7 @@ def analyze_financial_strength(metrics: list, financial_line_items: list) -> dic
         details.append("Cannot compute debt ratio (missing total_assets).")
 
     # 3. Dividend track record
-    div_periods = [item.dividends_and_other_cash_distributions for item in financial_line_items if
-                   item.dividends_and_other_cash_distributions is not None]
+    div_periods = financial_line_items.values("dividends_and_other_cash_distributions")
     if div_periods:
         # In many data feeds, dividend outflow is shown as a negative number
         # (money going out to shareholders). We'll consider any negative as 'paid a dividend'.
@@ -184,7 +203,7 @@ def analyze_financial_strength(metrics: list, financial_line_items: list) -> dic
     return {"score": score, "details": "; ".join(details)}
 
 
-def analyze_valuation_graham(metrics: list, financial_line_items: list, market_cap: float) -> dict:
+def analyze_valuation_graham(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, market_cap: float) -> dict:
     """
     Core Graham approach to valuation:
     1. Net-Net Check: (Current Assets - Total Liabilities) vs. Market Cap
@@ -257,3 +276,16 @@ def analyze_valuation_graham(metrics: list, financial_line_items: list, market_c
     # else: already appended details for missing graham_number
 
     return {"score": score, "details": "; ".join(details)}
+
+
+AGENT = AgentSpec(
+    name="ben_graham",
+    task=TaskName.BEN_GRAHAM,
+    run=ben_graham,
+    inputs=[
+        AgentInput(dataset="metrics", period="annual", limit=10),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="market_cap"),
+    ],
+    llm=True,
+)
@@ -2,6 +2,8 @@
 from tools.api import get_financial_metrics, get_market_cap, search_line_items,call_deepseek
 import json
 from utils.constants import TEMPLATE
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset, FinancialMetrics
+from utils.ProgressBar import TaskName
 
 """
     您是一个比尔·阿克曼（Bill Ackman）风格的 AI 投资代理人，依据他的原则进行投资决策：
@@ -35,7 +37,23 @@ from utils.constants import TEMPLATE
             管理层继续通过追求低投资回报率的收购来做出糟糕的资本配置决策。目前以自由现金流的18倍估值交易，鉴于运营挑战，没有安全边际……”
     """
 
-def bill_ackman(metrics,financial_line_items,market_cap):
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "revenue",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+    ],
+    period="annual",
+    limit=5,
+)
+
+
+def bill_ackman(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, market_cap):
     """
     Analyzes stocks using Bill Ackman's investing principles and LLM reasoning.
     Fetches multiple periods of data so we can analyze long-term trends.
@@ -105,7 +123,7 @@ def bill_ackman(metrics,financial_line_items,market_cap):
 
 
 
-def analyze_business_quality(metrics: list, financial_line_items: list) -> dict:
+def analyze_business_quality(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Analyze whether the company has a high-quality business with stable or growing cash flows,
     durable competitive advantages, and potential for long-term growth.
@@ -120,7 +138,7 @@ def analyze_business_quality(metrics: list, financial_line_items: list) -> dict:
         }
 
     # 1. Multi-period revenue growth analysis
-    revenues = [item.revenue for item in financial_line_items if item.revenue is not None]
+    revenues = financial_line_items.values("revenue")
     if len(revenues) >= 2:
         # Check if overall revenue grew from first to last
         initial, final = revenues[0], revenues[-1]
@@ -140,8 +158,8 @@ def analyze_business_quality(metrics: list, financial_line_items: list) -> dict:
 
     # 2. Operating margin and free cash flow consistency
     # We'll check if operating_margin or free_cash_flow are consistently positive/improving
-    fcf_vals = [item.free_cash_flow for item in financial_line_items if item.free_cash_flow is not None]
-    op_margin_vals = [item.operating_margin for item in financial_line_items if item.operating_margin is not None]
+    fcf_vals = financial_line_items.values("free_cash_flow")
+    op_margin_vals = financial_line_items.values("operating_margin")
 
     if op_margin_vals:
         # Check if the majority of operating margins are > 15%
@@ -182,7 +200,7 @@ def analyze_business_quality(metrics: list, financial_line_items: list) -> dict:
     }
 
 
-def analyze_financial_discipline(metrics: list, financial_line_items: list) -> dict:
+def analyze_financial_discipline(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Evaluate the company's balance sheet over multiple periods:
     - Debt ratio trends
@@ -199,7 +217,7 @@ def analyze_financial_discipline(metrics: list, financial_line_items: list) -> d
 
     # 1. Multi-period debt ratio or debt_to_equity
     # Check if the company's leverage is stable or improving
-    debt_to_equity_vals = [item.debt_to_equity for item in financial_line_items if item.debt_to_equity is not None]
+    debt_to_equity_vals = financial_line_items.values("debt_to_equity")
 
     # If we have multi-year data, see if D/E ratio has gone down or stayed <1 across most periods
     if debt_to_equity_vals:
@@ -228,8 +246,7 @@ def analyze_financial_discipline(metrics: list, financial_line_items: list) -> d
 
     # 2. Capital allocation approach (dividends + share counts)
     # If the company paid dividends or reduced share count over time, it may reflect discipline
-    dividends_list = [item.dividends_and_other_cash_distributions for item in financial_line_items if
-                      item.dividends_and_other_cash_distributions is not None]
+    dividends_list = financial_line_items.values("dividends_and_other_cash_distributions")
     if dividends_list:
         # Check if dividends were paid (i.e., negative outflows to shareholders) in most periods
         paying_dividends_count = sum(1 for d in dividends_list if d < 0)
@@ -243,7 +260,7 @@ def analyze_financial_discipline(metrics: list, financial_line_items: list) -> d
 
     # Check for decreasing share count (simple approach):
     # We can compare first vs last if we have at least two data points
-    shares = [item.outstanding_shares for item in financial_line_items if item.outstanding_shares is not None]
+    shares = financial_line_items.values("outstanding_shares")
     if len(shares) >= 2:
         if shares[-1] < shares[0]:
             score += 1
@@ -259,7 +276,7 @@ def analyze_financial_discipline(metrics: list, financial_line_items: list) -> d
     }
 
 
-def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
+def analyze_valuation(financial_line_items: FinancialDataset, market_cap: float) -> dict:
     """
     Ackman invests in companies trading at a discount to intrinsic value.
     We can do a simplified DCF or an FCF-based approach.
@@ -323,4 +340,14 @@ def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
     }
 
 
-
+AGENT = AgentSpec(
+    name="bill_ackman",
+    task=TaskName.BILL_ACKMAN,
+    run=bill_ackman,
+    inputs=[
+        AgentInput(dataset="metrics", period="annual", limit=5),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="market_cap"),
+    ],
+    llm=True,
+)
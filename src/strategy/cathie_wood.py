@@ -1,5 +1,27 @@
-
-def cathie_wood(metrics, financial_line_items,market_cap):
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset, FinancialMetrics
+from utils.ProgressBar import TaskName
+
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "revenue",
+        "gross_margin",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+        "research_and_development",
+        "capital_expenditure",
+        "operating_expense",
+    ],
+    period="annual",
+    limit=5,
+)
+
+
+def cathie_wood(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, market_cap):
     """
     Analyzes stocks using Cathie Wood's investing principles and LLM reasoning.
     1. Prioritizes companies with breakthrough technologies or business models
@@ -68,7 +90,7 @@ def cathie_wood(metrics, financial_line_items,market_cap):
 
 
 
-def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> dict:
+def analyze_disruptive_potential(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Analyze whether the company has disruptive products, technology, or business model.
     Evaluates multiple dimensions of disruptive potential:
@@ -88,7 +110,7 @@ def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> d
         }
 
     # 1. Revenue Growth Analysis - Check for accelerating growth
-    revenues = [item.revenue for item in financial_line_items if item.revenue]
+    revenues = financial_line_items.values("revenue", nonzero=True)
     if len(revenues) >= 3:  # Need at least 3 periods to check acceleration
         growth_rates = []
         for i in range(len(revenues)-1):
@@ -116,7 +138,7 @@ def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> d
         details.append("Insufficient revenue data for growth analysis")
 
     # 2. Gross Margin Analysis - Check for expanding margins
-    gross_margins = [item.gross_margin for item in financial_line_items if hasattr(item, 'gross_margin') and item.gross_margin is not None]
+    gross_margins = financial_line_items.values("gross_margin")
     if len(gross_margins) >= 2:
         margin_trend = gross_margins[-1] - gross_margins[0]
         if margin_trend > 0.05:  # 5% improvement
@@ -134,12 +156,8 @@ def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> d
         details.append("Insufficient gross margin data")
 
     # 3. Operating Leverage Analysis
-    revenues = [item.revenue for item in financial_line_items if item.revenue]
-    operating_expenses = [
-        item.operating_expense
-        for item in financial_line_items
-        if hasattr(item, "operating_expense") and item.operating_expense
-    ]
+    revenues = financial_line_items.values("revenue", nonzero=True)
+    operating_expenses = financial_line_items.values("operating_expense", nonzero=True)
 
     if len(revenues) >= 2 and len(operating_expenses) >= 2:
         rev_growth = (revenues[-1] - revenues[0]) / abs(revenues[0])
@@ -152,7 +170,7 @@ def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> d
         details.append("Insufficient data for operating leverage analysis")
 
     # 4. R&D Investment Analysis
-    rd_expenses = [item.research_and_development for item in financial_line_items if hasattr(item, 'research_and_development') and item.research_and_development is not None]
+    rd_expenses = financial_line_items.values("research_and_development")
     if rd_expenses and revenues:
         rd_intensity = rd_expenses[-1] / revenues[-1]
         if rd_intensity > 0.15:  # High R&D intensity
@@ -179,7 +197,7 @@ def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> d
     }
 
 
-def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict:
+def analyze_innovation_growth(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Evaluate the company's commitment to innovation and potential for exponential growth.
     Analyzes multiple dimensions:
@@ -199,12 +217,8 @@ def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict
         }
 
     # 1. R&D Investment Trends
-    rd_expenses = [
-        item.research_and_development
-        for item in financial_line_items
-        if hasattr(item, "research_and_development") and item.research_and_development
-    ]
-    revenues = [item.revenue for item in financial_line_items if item.revenue]
+    rd_expenses = financial_line_items.values("research_and_development", nonzero=True)
+    revenues = financial_line_items.values("revenue", nonzero=True)
 
     if rd_expenses and revenues and len(rd_expenses) >= 2:
         # Check R&D growth rate
@@ -226,7 +240,7 @@ def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict
         details.append("Insufficient R&D data for trend analysis")
 
     # 2. Free Cash Flow Analysis
-    fcf_vals = [item.free_cash_flow for item in financial_line_items if item.free_cash_flow]
+    fcf_vals = financial_line_items.values("free_cash_flow", nonzero=True)
     if fcf_vals and len(fcf_vals) >= 2:
         # Check FCF growth and consistency
         fcf_growth = (fcf_vals[-1] - fcf_vals[0]) / abs(fcf_vals[0])
@@ -245,7 +259,7 @@ def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict
         details.append("Insufficient FCF data for analysis")
 
     # 3. Operating Efficiency Analysis
-    op_margin_vals = [item.operating_margin for item in financial_line_items if item.operating_margin]
+    op_margin_vals = financial_line_items.values("operating_margin", nonzero=True)
     if op_margin_vals and len(op_margin_vals) >= 2:
         # Check margin improvement
         margin_trend = op_margin_vals[-1] - op_margin_vals[0]
@@ -263,7 +277,7 @@ def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict
         details.append("Insufficient operating margin data")
 
     # 4. Capital Allocation Analysis
-    capex = [item.capital_expenditure for item in financial_line_items if hasattr(item, 'capital_expenditure') and item.capital_expenditure]
+    capex = financial_line_items.values("capital_expenditure", nonzero=True)
     if capex and revenues and len(capex) >= 2:
         capex_intensity = abs(capex[-1]) / revenues[-1]
         capex_growth = (abs(capex[-1]) - abs(capex[0])) / abs(capex[0]) if capex[0] != 0 else 0
@@ -278,7 +292,7 @@ def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict
         details.append("Insufficient CAPEX data")
 
     # 5. Growth Reinvestment Analysis
-    dividends = [item.dividends_and_other_cash_distributions for item in financial_line_items if hasattr(item, 'dividends_and_other_cash_distributions') and item.dividends_and_other_cash_distributions]
+    dividends = financial_line_items.values("dividends_and_other_cash_distributions", nonzero=True)
     if dividends and fcf_vals:
         # Check if company prioritizes reinvestment over dividends
         latest_payout_ratio = dividends[-1] / fcf_vals[-1] if fcf_vals[-1] != 0 else 1
@@ -303,7 +317,7 @@ def analyze_innovation_growth(metrics: list, financial_line_items: list) -> dict
     }
 
 
-def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float) -> dict:
+def analyze_cathie_wood_valuation(financial_line_items: FinancialDataset, market_cap: float) -> dict:
     """
     Cathie Wood often focuses on long-term exponential growth potential. We can do
     a simplified approach looking for a large total addressable market (TAM) and the
@@ -364,3 +378,15 @@ def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float)
         "margin_of_safety": margin_of_safety
     }
 
+
+AGENT = AgentSpec(
+    name="cathie_wood",
+    task=TaskName.CATHIE_WOOD,
+    run=cathie_wood,
+    inputs=[
+        AgentInput(dataset="metrics", period="annual", limit=5),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="market_cap"),
+    ],
+    llm=True,
+)
@@ -1,11 +1,35 @@
 
 from utils.constants import TEMPLATE
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset, FinancialMetrics
+from utils.ProgressBar import TaskName
 
 
 
 
 
-def charlie_munger(metrics,financial_line_items,insider_trades,market_cap,company_news):
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "revenue",
+        "net_income",
+        "operating_income",
+        "return_on_invested_capital",
+        "gross_margin",
+        "operating_margin",
+        "free_cash_flow",
+        "capital_expenditure",
+        "cash_and_equivalents",
+        "total_debt",
+        "shareholders_equity",
+        "outstanding_shares",
+        "research_and_development",
+        "goodwill_and_intangible_assets",
+    ],
+    period="annual",
+    limit=10,
+)
+
+
+def charlie_munger(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, insider_trades, market_cap, company_news):
     """
     Analyzes stocks using Charlie Munger's investing principles and mental models.
     Focuses on moat strength, management quality, predictability, and valuation.
@@ -90,7 +114,7 @@ def charlie_munger(metrics,financial_line_items,insider_trades,market_cap,compan
     return analysis_data, intro_text, prompt
 
 
-def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
+def analyze_moat_strength(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset) -> dict:
     """
     Analyze the business's competitive advantage using Munger's approach:
     - Consistent high returns on capital (ROIC)
@@ -108,8 +132,7 @@ def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
         }
     
     # 1. Return on Invested Capital (ROIC) analysis - Munger's favorite metric
-    roic_values = [item.return_on_invested_capital for item in financial_line_items 
-                   if hasattr(item, 'return_on_invested_capital') and item.return_on_invested_capital is not None]
+    roic_values = financial_line_items.values("return_on_invested_capital")
     
     if roic_values:
         # Check if ROIC consistently above 15% (Munger's threshold)
@@ -129,8 +152,7 @@ def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
         details.append("No ROIC data available")
     
     # 2. Pricing power - check gross margin stability and trends
-    gross_margins = [item.gross_margin for item in financial_line_items 
-                    if hasattr(item, 'gross_margin') and item.gross_margin is not None]
+    gross_margins = financial_line_items.values("gross_margin")
     
     if gross_margins and len(gross_margins) >= 3:
         # Munger likes stable or improving gross margins
@@ -172,11 +194,9 @@ def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
         details.append("Insufficient data for capital intensity analysis")
     
     # 4. Intangible assets - Munger values R&D and intellectual property
-    r_and_d = [item.research_and_development for item in financial_line_items
-              if hasattr(item, 'research_and_development') and item.research_and_development is not None]
+    r_and_d = financial_line_items.values("research_and_development")
     
-    goodwill_and_intangible_assets = [item.goodwill_and_intangible_assets for item in financial_line_items
-               if hasattr(item, 'goodwill_and_intangible_assets') and item.goodwill_and_intangible_assets is not None]
+    goodwill_and_intangible_assets = financial_line_items.values("goodwill_and_intangible_assets")
 
     if r_and_d and len(r_and_d) > 0:
         if sum(r_and_d) > 0:  # If company is investing in R&D
@@ -196,7 +216,7 @@ def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
     }
 
 
-def analyze_management_quality(financial_line_items: list, insider_trades: list) -> dict:
+def analyze_management_quality(financial_line_items: FinancialDataset, insider_trades: list) -> dict:
     """
     Evaluate management quality using Munger's criteria:
     - Capital allocation wisdom
@@ -216,11 +236,9 @@ def analyze_management_quality(financial_line_items: list, insider_trades: list)
     
     # 1. Capital allocation - Check FCF to net income ratio
     # Munger values companies that convert earnings to cash
-    fcf_values = [item.free_cash_flow for item in financial_line_items 
-                 if hasattr(item, 'free_cash_flow') and item.free_cash_flow is not None]
+    fcf_values = financial_line_items.values("free_cash_flow")
     
-    net_income_values = [item.net_income for item in financial_line_items 
-                        if hasattr(item, 'net_income') and item.net_income is not None]
+    net_income_values = financial_line_items.values("net_income")
     
     if fcf_values and net_income_values and len(fcf_values) == len(net_income_values):
         # Calculate FCF to Net Income ratio for each period
@@ -248,11 +266,9 @@ def analyze_management_quality(financial_line_items: list, insider_trades: list)
         details.append("Missing FCF or Net Income data")
     
     # 2. Debt management - Munger is cautious about debt
-    debt_values = [item.total_debt for item in financial_line_items 
-                  if hasattr(item, 'total_debt') and item.total_debt is not None]
+    debt_values = financial_line_items.values("total_debt")
     
-    equity_values = [item.shareholders_equity for item in financial_line_items 
-                    if hasattr(item, 'shareholders_equity') and item.shareholders_equity is not None]
+    equity_values = financial_line_items.values("shareholders_equity")
     
     if debt_values and equity_values and len(debt_values) == len(equity_values):
         # Calculate D/E ratio for most recent period
@@ -273,10 +289,8 @@ def analyze_management_quality(financial_line_items: list, insider_trades: list)
         details.append("Missing debt or equity data")
     
     # 3. Cash management efficiency - Munger values appropriate cash levels
-    cash_values = [item.cash_and_equivalents for item in financial_line_items
-                  if hasattr(item, 'cash_and_equivalents') and item.cash_and_equivalents is not None]
-    revenue_values = [item.revenue for item in financial_line_items
-                     if hasattr(item, 'revenue') and item.revenue is not None]
+    cash_values = financial_line_items.values("cash_and_equivalents")
+    revenue_values = financial_line_items.values("revenue")
     
     if cash_values and revenue_values and len(cash_values) > 0 and len(revenue_values) > 0:
         # Calculate cash to revenue ratio (Munger likes 10-20% for most businesses)
@@ -328,8 +342,7 @@ def analyze_management_quality(financial_line_items: list, insider_trades: list)
         details.append("No insider trading data available")
     
     # 5. Consistency in share count - Munger prefers stable/decreasing shares
-    share_counts = [item.outstanding_shares for item in financial_line_items
-                   if hasattr(item, 'outstanding_shares') and item.outstanding_shares is not None]
+    share_counts = financial_line_items.values("outstanding_shares")
     
     if share_counts and len(share_counts) >= 3:
         if share_counts[0] < share_counts[-1] * 0.95:  # 5%+ reduction in shares
@@ -356,7 +369,7 @@ def analyze_management_quality(financial_line_items: list, insider_trades: list)
     }
 
 
-def analyze_predictability(financial_line_items: list) -> dict:
+def analyze_predictability(financial_line_items: FinancialDataset) -> dict:
     """
     Assess the predictability of the business - Munger strongly prefers businesses
     whose future operations and cashflows are relatively easy to predict.
@@ -371,8 +384,7 @@ def analyze_predictability(financial_line_items: list) -> dict:
         }
     
     # 1. Revenue stability and growth
-    revenues = [item.revenue for item in financial_line_items 
-               if hasattr(item, 'revenue') and item.revenue is not None]
+    revenues = financial_line_items.values("revenue")
     
     if revenues and len(revenues) >= 5:
         # Calculate year-over-year growth rates
@@ -399,8 +411,7 @@ def analyze_predictability(financial_line_items: list) -> dict:
         details.append("Insufficient revenue history for predictability analysis")
     
     # 2. Operating income stability
-    op_income = [item.operating_income for item in financial_line_items 
-                if hasattr(item, 'operating_income') and item.operating_income is not None]
+    op_income = financial_line_items.values("operating_income")
     
     if op_income and len(op_income) >= 5:
         # Count positive operating income periods
@@ -424,8 +435,7 @@ def analyze_predictability(financial_line_items: list) -> dict:
         details.append("Insufficient operating income history")
     
     # 3. Margin consistency - Munger values stable margins
-    op_margins = [item.operating_margin for item in financial_line_items 
-                 if hasattr(item, 'operating_margin') and item.operating_margin is not None]
+    op_margins = financial_line_items.values("operating_margin")
     
     if op_margins and len(op_margins) >= 5:
         # Calculate margin volatility
@@ -444,8 +454,7 @@ def analyze_predictability(financial_line_items: list) -> dict:
         details.append("Insufficient margin history")
     
     # 4. Cash generation reliability
-    fcf_values = [item.free_cash_flow for item in financial_line_items 
-                 if hasattr(item, 'free_cash_flow') and item.free_cash_flow is not None]
+    fcf_values = financial_line_items.values("free_cash_flow")
     
     if fcf_values and len(fcf_values) >= 5:
         # Count positive FCF periods
@@ -474,7 +483,7 @@ def analyze_predictability(financial_line_items: list) -> dict:
     }
 
 
-def calculate_munger_valuation(financial_line_items: list, market_cap: float) -> dict:
+def calculate_munger_valuation(financial_line_items: FinancialDataset, market_cap: float) -> dict:
     """
     Calculate intrinsic value using Munger's approach:
     - Focus on owner earnings (approximated by FCF)
@@ -491,8 +500,7 @@ def calculate_munger_valuation(financial_line_items: list, market_cap: float) ->
         }
     
     # Get FCF values (Munger's preferred "owner earnings" metric)
-    fcf_values = [item.free_cash_flow for item in financial_line_items 
-                 if hasattr(item, 'free_cash_flow') and item.free_cash_flow is not None]
+    fcf_values = financial_line_items.values("free_cash_flow")
     
     if not fcf_values or len(fcf_values) < 3:
         return {
@@ -592,3 +600,18 @@ def analyze_news_sentiment(news_items: list) -> str:
     
     # Just return a simple count for now - in a real implementation, this would use NLP
     return f"Qualitative review of {len(news_items)} recent news items would be needed"
+
+
+AGENT = AgentSpec(
+    name="charlie_munger",
+    task=TaskName.CHARLIE_MUNGER,
+    run=charlie_munger,
+    inputs=[
+        AgentInput(dataset="metrics", period="annual", limit=10),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="insider_trades", limit=100),
+        AgentInput(dataset="market_cap"),
+        AgentInput(dataset="company_news", limit=100),
+    ],
+    llm=True,
+)
@@ -2,10 +2,11 @@
 
 
 from utils.ProgressBar import progress, ProgressStatus, TaskName
+from data.models import AgentInput, AgentSpec, FinancialMetrics
 
 
 ##### Fundamental Agent #####
-def fundamentals(financial_metrics):
+def fundamentals(financial_metrics: list[FinancialMetrics]):
     """Analyzes fundamental data and generates trading signals for multiple tickers."""
 
     # Get the financial metrics
@@ -131,3 +132,11 @@ def fundamentals(financial_metrics):
     return fundamental_analysis
 
 
+AGENT = AgentSpec(
+    name="fundamentals",
+    task=TaskName.FUNDAMENTALS,
+    run=fundamentals,
+    inputs=[
+        AgentInput(dataset="metrics", period="ttm", limit=10),
+    ],
+)
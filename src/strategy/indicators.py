@@ -0,0 +1,373 @@
+import json
+import math
+import os
+import tempfile
+from collections import deque
+
+import pandas as pd
+
+
+##### Incremental Indicators #####
+# 每个指标都可以先用历史数据初始化，之后每根新 K 线 O(1) 更新，状态可以序列化保存。
+# 计算口径与 strategy.technicals 中的 pandas 实现一致。
+
+
+class EMA:
+    """ewm(span=span, adjust=False).mean(); alpha=1/span instead gives Wilder smoothing."""
+
+    def __init__(self, span: int, wilder: bool = False):
+        self.span = span
+        self.wilder = wilder
+        self.alpha = 1 / span if wilder else 2 / (span + 1)
+        self.value = math.nan
+
+    def update(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        self.value = x if math.isnan(self.value) else (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+    def state_dict(self) -> dict:
+        return {"span": self.span, "wilder": self.wilder, "value": self.value}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "EMA":
+        indicator = cls(state["span"], state["wilder"])
+        indicator.value = state["value"]
+        return indicator
+
+
+class AdjustedEWM:
+    """ewm(span=span).mean() with pandas' default adjust=True, kept as a decayed numerator/denominator."""
+
+    def __init__(self, span: int):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    @property
+    def value(self) -> float:
+        return self.numerator / self.denominator if self.denominator > 0 else math.nan
+
+    def update(self, x: float) -> float:
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if not math.isnan(x):
+            self.numerator += x
+            self.denominator += 1
+        return self.value
+
+    def state_dict(self) -> dict:
+        return {"span": self.span, "numerator": self.numerator, "denominator": self.denominator}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "AdjustedEWM":
+        indicator = cls(state["span"])
+        indicator.numerator = state["numerator"]
+        indicator.denominator = state["denominator"]
+        return indicator
+
+
+class RollingStats:
+    """rolling(window).mean()/.std() over the last `window` values with running sums."""
+
+    # 每隔若干次更新用窗口内数据重算一次累加和，消除浮点误差累积
+    _RESYNC_EVERY = 1000
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._updates = 0
+
+    def update(self, x: float) -> None:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self._updates += 1
+        if self._updates % self._RESYNC_EVERY == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window and not any(math.isnan(v) for v in self.values)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.window if self.ready else math.nan
+
+    @property
+    def variance(self) -> float:
+        if not self.ready or self.window < 2:
+            return math.nan
+        n = self.window
+        return max((self.total_sq - self.total * self.total / n) / (n - 1), 0.0)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def state_dict(self) -> dict:
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "RollingStats":
+        indicator = cls(state["window"])
+        for value in state["values"]:
+            indicator.update(value)
+        return indicator
+
+
+class RSI:
+    """calculate_rsi: simple rolling means of gains and losses."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = math.nan
+        self.gains = RollingStats(period)
+        self.losses = RollingStats(period)
+
+    @property
+    def value(self) -> float:
+        avg_gain = self.gains.mean
+        avg_loss = self.losses.mean
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return math.nan
+        if avg_loss == 0:
+            return math.nan if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def update(self, close: float) -> float:
+        delta = close - self.prev_close
+        self.gains.update(delta if delta > 0 else 0.0)
+        self.losses.update(-delta if delta < 0 else 0.0)
+        self.prev_close = close
+        return self.value
+
+    def state_dict(self) -> dict:
+        return {
+            "period": self.period,
+            "prev_close": self.prev_close,
+            "gains": self.gains.state_dict(),
+            "losses": self.losses.state_dict(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "RSI":
+        indicator = cls(state["period"])
+        indicator.prev_close = state["prev_close"]
+        indicator.gains = RollingStats.from_state(state["gains"])
+        indicator.losses = RollingStats.from_state(state["losses"])
+        return indicator
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    if math.isnan(prev_close):
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class ATR:
+    """calculate_atr: rolling mean of the true range."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = math.nan
+        self.true_range = RollingStats(period)
+
+    @property
+    def value(self) -> float:
+        return self.true_range.mean
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.true_range.update(_true_range(high, low, self.prev_close))
+        self.prev_close = close
+        return self.value
+
+    def state_dict(self) -> dict:
+        return {"period": self.period, "prev_close": self.prev_close, "true_range": self.true_range.state_dict()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ATR":
+        indicator = cls(state["period"])
+        indicator.prev_close = state["prev_close"]
+        indicator.true_range = RollingStats.from_state(state["true_range"])
+        return indicator
+
+
+class ADX:
+    """
+    calculate_adx: +DI/-DI/ADX on span-based EWMs (adjust=True), as in strategy.technicals.
+    wilder=True switches to classic Wilder smoothing (alpha = 1/period).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.prev_high = math.nan
+        self.prev_low = math.nan
+        self.prev_close = math.nan
+        self.true_range = self._smoother()
+        self.plus_dm = self._smoother()
+        self.minus_dm = self._smoother()
+        self.dx = self._smoother()
+
+    def _smoother(self):
+        return EMA(self.period, wilder=True) if self.wilder else AdjustedEWM(self.period)
+
+    @property
+    def plus_di(self) -> float:
+        return 100 * self.plus_dm.value / self.true_range.value if self.true_range.value else math.nan
+
+    @property
+    def minus_di(self) -> float:
+        return 100 * self.minus_dm.value / self.true_range.value if self.true_range.value else math.nan
+
+    @property
+    def value(self) -> float:
+        return self.dx.value
+
+    def update(self, high: float, low: float, close: float) -> float:
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        self.true_range.update(_true_range(high, low, self.prev_close))
+        self.plus_dm.update(up_move if up_move > down_move and up_move > 0 else 0.0)
+        self.minus_dm.update(down_move if down_move > up_move and down_move > 0 else 0.0)
+        plus_di, minus_di = self.plus_di, self.minus_di
+        di_sum = plus_di + minus_di
+        self.dx.update(100 * abs(plus_di - minus_di) / di_sum if di_sum else math.nan)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        return self.value
+
+    def state_dict(self) -> dict:
+        return {
+            "period": self.period,
+            "wilder": self.wilder,
+            "prev": [self.prev_high, self.prev_low, self.prev_close],
+            "true_range": self.true_range.state_dict(),
+            "plus_dm": self.plus_dm.state_dict(),
+            "minus_dm": self.minus_dm.state_dict(),
+            "dx": self.dx.state_dict(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ADX":
+        indicator = cls(state["period"], state["wilder"])
+        indicator.prev_high, indicator.prev_low, indicator.prev_close = state["prev"]
+        smoother = EMA if indicator.wilder else AdjustedEWM
+        for name in ("true_range", "plus_dm", "minus_dm", "dx"):
+            setattr(indicator, name, smoother.from_state(state[name]))
+        return indicator
+
+
+class TechnicalState:
+    """
+    Per-ticker set of incremental indicators used by the technical analyst.
+    Seed once from history, then feed each new bar with update(); bars that are
+    not newer than the last one seen are ignored, so re-feeding is harmless.
+    A bar that can still be revised (today's, while trading) must therefore not
+    go into a state that is kept: apply it to a copy instead.
+    """
+
+    def __init__(self):
+        self.last_time: str | None = None
+        self.close = math.nan
+        self.ema_8 = EMA(8)
+        self.ema_21 = EMA(21)
+        self.ema_55 = EMA(55)
+        self.adx = ADX(14)
+        self.rsi_14 = RSI(14)
+        self.rsi_28 = RSI(28)
+        self.close_20 = RollingStats(20)
+        self.close_50 = RollingStats(50)
+        self.atr = ATR(14)
+
+    def seed(self, prices_df: pd.DataFrame) -> "TechnicalState":
+        for time, row in zip(prices_df["time"], prices_df[["high", "low", "close"]].itertuples(index=False)):
+            self.update(time, row.high, row.low, row.close)
+        return self
+
+    def update(self, time: str, high: float, low: float, close: float) -> bool:
+        if self.last_time is not None and time <= self.last_time:
+            return False
+        self.last_time = time
+        self.close = close
+        self.ema_8.update(close)
+        self.ema_21.update(close)
+        self.ema_55.update(close)
+        self.adx.update(high, low, close)
+        self.rsi_14.update(close)
+        self.rsi_28.update(close)
+        self.close_20.update(close)
+        self.close_50.update(close)
+        self.atr.update(high, low, close)
+        return True
+
+    def snapshot(self) -> dict:
+        bb_upper = self.close_20.mean + 2 * self.close_20.std
+        bb_lower = self.close_20.mean - 2 * self.close_20.std
+        return {
+            "time": self.last_time,
+            "ema_8": self.ema_8.value,
+            "ema_21": self.ema_21.value,
+            "ema_55": self.ema_55.value,
+            "adx": self.adx.value,
+            "+di": self.adx.plus_di,
+            "-di": self.adx.minus_di,
+            "rsi_14": self.rsi_14.value,
+            "rsi_28": self.rsi_28.value,
+            "bb_upper": bb_upper,
+            "bb_lower": bb_lower,
+            "z_score": (self.close - self.close_50.mean) / self.close_50.std if self.close_50.std else math.nan,
+            "atr": self.atr.value,
+        }
+
+    def state_dict(self) -> dict:
+        return {
+            "last_time": self.last_time,
+            "close": self.close,
+            "ema_8": self.ema_8.state_dict(),
+            "ema_21": self.ema_21.state_dict(),
+            "ema_55": self.ema_55.state_dict(),
+            "adx": self.adx.state_dict(),
+            "rsi_14": self.rsi_14.state_dict(),
+            "rsi_28": self.rsi_28.state_dict(),
+            "close_20": self.close_20.state_dict(),
+            "close_50": self.close_50.state_dict(),
+            "atr": self.atr.state_dict(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "TechnicalState":
+        indicator = cls()
+        indicator.last_time = state["last_time"]
+        indicator.close = state["close"]
+        indicator.ema_8 = EMA.from_state(state["ema_8"])
+        indicator.ema_21 = EMA.from_state(state["ema_21"])
+        indicator.ema_55 = EMA.from_state(state["ema_55"])
+        indicator.adx = ADX.from_state(state["adx"])
+        indicator.rsi_14 = RSI.from_state(state["rsi_14"])
+        indicator.rsi_28 = RSI.from_state(state["rsi_28"])
+        indicator.close_20 = RollingStats.from_state(state["close_20"])
+        indicator.close_50 = RollingStats.from_state(state["close_50"])
+        indicator.atr = ATR.from_state(state["atr"])
+        return indicator
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.state_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TechnicalState":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_state(json.load(f))
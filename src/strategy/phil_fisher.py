@@ -2,9 +2,32 @@
 import statistics
 
 from utils.constants import TEMPLATE
-
-
-def phil_fisher(financial_line_items,market_cap,insider_trades,company_news):
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset
+from utils.ProgressBar import TaskName
+
+
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "revenue",
+        "net_income",
+        "earnings_per_share",
+        "free_cash_flow",
+        "research_and_development",
+        "operating_income",
+        "operating_margin",
+        "gross_margin",
+        "total_debt",
+        "shareholders_equity",
+        "cash_and_equivalents",
+        "ebit",
+        "ebitda",
+    ],
+    period="annual",
+    limit=5,
+)
+
+
+def phil_fisher(financial_line_items: FinancialDataset, market_cap, insider_trades, company_news):
     """
     Analyzes stocks using Phil Fisher's investing principles:
       - Seek companies with long-term above-average growth potential
@@ -111,7 +134,7 @@ def phil_fisher(financial_line_items,market_cap,insider_trades,company_news):
 
 
 
-def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
+def analyze_fisher_growth_quality(financial_line_items: FinancialDataset) -> dict:
     """
     Evaluate growth & quality:
       - Consistent Revenue Growth
@@ -128,7 +151,7 @@ def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
     raw_score = 0  # up to 9 raw points => scale to 0–10
 
     # 1. Revenue Growth (YoY)
-    revenues = [fi.revenue for fi in financial_line_items if fi.revenue is not None]
+    revenues = financial_line_items.values("revenue")
     if len(revenues) >= 2:
         # We'll look at the earliest vs. latest to gauge multi-year growth if possible
         latest_rev = revenues[0]
@@ -152,7 +175,7 @@ def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
         details.append("Not enough revenue data points for growth calculation.")
 
     # 2. EPS Growth (YoY)
-    eps_values = [fi.earnings_per_share for fi in financial_line_items if fi.earnings_per_share is not None]
+    eps_values = financial_line_items.values("earnings_per_share")
     if len(eps_values) >= 2:
         latest_eps = eps_values[0]
         oldest_eps = eps_values[-1]
@@ -175,7 +198,7 @@ def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
         details.append("Not enough EPS data points for growth calculation.")
 
     # 3. R&D as % of Revenue (if we have R&D data)
-    rnd_values = [fi.research_and_development for fi in financial_line_items if fi.research_and_development is not None]
+    rnd_values = financial_line_items.values("research_and_development")
     if rnd_values and revenues and len(rnd_values) == len(revenues):
         # We'll just look at the most recent for a simple measure
         recent_rnd = rnd_values[0]
@@ -202,7 +225,7 @@ def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
     return {"score": final_score, "details": "; ".join(details)}
 
 
-def analyze_margins_stability(financial_line_items: list) -> dict:
+def analyze_margins_stability(financial_line_items: FinancialDataset) -> dict:
     """
     Looks at margin consistency (gross/operating margin) and general stability over time.
     """
@@ -216,7 +239,7 @@ def analyze_margins_stability(financial_line_items: list) -> dict:
     raw_score = 0  # up to 6 => scale to 0-10
 
     # 1. Operating Margin Consistency
-    op_margins = [fi.operating_margin for fi in financial_line_items if fi.operating_margin is not None]
+    op_margins = financial_line_items.values("operating_margin")
     if len(op_margins) >= 2:
         # Check if margins are stable or improving (comparing oldest to newest)
         oldest_op_margin = op_margins[-1]
@@ -233,7 +256,7 @@ def analyze_margins_stability(financial_line_items: list) -> dict:
         details.append("Not enough operating margin data points")
 
     # 2. Gross Margin Level
-    gm_values = [fi.gross_margin for fi in financial_line_items if fi.gross_margin is not None]
+    gm_values = financial_line_items.values("gross_margin")
     if gm_values:
         # We'll just take the most recent
         recent_gm = gm_values[0]
@@ -268,7 +291,7 @@ def analyze_margins_stability(financial_line_items: list) -> dict:
     return {"score": final_score, "details": "; ".join(details)}
 
 
-def analyze_management_efficiency_leverage(financial_line_items: list) -> dict:
+def analyze_management_efficiency_leverage(financial_line_items: FinancialDataset) -> dict:
     """
     Evaluate management efficiency & leverage:
       - Return on Equity (ROE)
@@ -285,8 +308,8 @@ def analyze_management_efficiency_leverage(financial_line_items: list) -> dict:
     raw_score = 0  # up to 6 => scale to 0–10
 
     # 1. Return on Equity (ROE)
-    ni_values = [fi.net_income for fi in financial_line_items if fi.net_income is not None]
-    eq_values = [fi.shareholders_equity for fi in financial_line_items if fi.shareholders_equity is not None]
+    ni_values = financial_line_items.values("net_income")
+    eq_values = financial_line_items.values("shareholders_equity")
     if ni_values and eq_values and len(ni_values) == len(eq_values):
         recent_ni = ni_values[0]
         recent_eq = eq_values[0] if eq_values[0] else 1e-9
@@ -309,7 +332,7 @@ def analyze_management_efficiency_leverage(financial_line_items: list) -> dict:
         details.append("Insufficient data for ROE calculation")
 
     # 2. Debt-to-Equity
-    debt_values = [fi.total_debt for fi in financial_line_items if fi.total_debt is not None]
+    debt_values = financial_line_items.values("total_debt")
     if debt_values and eq_values and len(debt_values) == len(eq_values):
         recent_debt = debt_values[0]
         recent_equity = eq_values[0] if eq_values[0] else 1e-9
@@ -326,7 +349,7 @@ def analyze_management_efficiency_leverage(financial_line_items: list) -> dict:
         details.append("Insufficient data for debt/equity analysis")
 
     # 3. FCF Consistency
-    fcf_values = [fi.free_cash_flow for fi in financial_line_items if fi.free_cash_flow is not None]
+    fcf_values = financial_line_items.values("free_cash_flow")
     if fcf_values and len(fcf_values) >= 2:
         # Check if FCF is positive in recent years
         positive_fcf_count = sum(1 for x in fcf_values if x and x > 0)
@@ -344,7 +367,7 @@ def analyze_management_efficiency_leverage(financial_line_items: list) -> dict:
     return {"score": final_score, "details": "; ".join(details)}
 
 
-def analyze_fisher_valuation(financial_line_items: list, market_cap: float | None) -> dict:
+def analyze_fisher_valuation(financial_line_items: FinancialDataset, market_cap: float | None) -> dict:
     """
     Phil Fisher is willing to pay for quality and growth, but still checks:
       - P/E
@@ -359,8 +382,8 @@ def analyze_fisher_valuation(financial_line_items: list, market_cap: float | Non
     raw_score = 0
 
     # Gather needed data
-    net_incomes = [fi.net_income for fi in financial_line_items if fi.net_income is not None]
-    fcf_values = [fi.free_cash_flow for fi in financial_line_items if fi.free_cash_flow is not None]
+    net_incomes = financial_line_items.values("net_income")
+    fcf_values = financial_line_items.values("free_cash_flow")
 
     # 1) P/E
     recent_net_income = net_incomes[0] if net_incomes else None
@@ -469,3 +492,17 @@ def analyze_sentiment(news_items: list) -> dict:
         details.append("Mostly positive/neutral headlines")
 
     return {"score": score, "details": "; ".join(details)}
+
+
+AGENT = AgentSpec(
+    name="phil_fisher",
+    task=TaskName.PHIL_FISHER,
+    run=phil_fisher,
+    inputs=[
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="market_cap"),
+        AgentInput(dataset="insider_trades", limit=50),
+        AgentInput(dataset="company_news", limit=50),
+    ],
+    llm=True,
+)
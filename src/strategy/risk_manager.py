@@ -1,17 +1,15 @@
 
-from tools.api import get_prices, prices_to_df
+import pandas as pd
 
 
 
 ##### Risk Management Agent #####
-def risk_management_agent(prices,ticker,portfolio):
+def risk_management_agent(prices_df: pd.DataFrame, ticker, portfolio):
 
 
-    if not prices:
+    if prices_df.empty:
         print(f"Warning: No price data found for {ticker}. Skipping.")
 
-    prices_df = prices_to_df(prices)
-
     # Calculate portfolio value
     current_price = prices_df["close"].iloc[-1]
 
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 import json
+from data.models import AgentInput, AgentSpec
+from utils.ProgressBar import TaskName
 
 
 ##### Sentiment Agent #####
@@ -53,3 +55,13 @@ def sentiment(insider_trades,company_news):
 
     return sentiment_analysis
 
+
+AGENT = AgentSpec(
+    name="sentiment",
+    task=TaskName.SENTIMENT,
+    run=sentiment,
+    inputs=[
+        AgentInput(dataset="insider_trades"),
+        AgentInput(dataset="company_news"),
+    ],
+)
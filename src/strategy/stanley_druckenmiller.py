@@ -1,8 +1,32 @@
 
 import statistics
-
-
-def stanley_druckenmiller(prices,financial_line_items,company_news,insider_trades,market_cap):
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset
+from utils.ProgressBar import TaskName
+
+
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "revenue",
+        "earnings_per_share",
+        "net_income",
+        "operating_income",
+        "gross_margin",
+        "operating_margin",
+        "free_cash_flow",
+        "capital_expenditure",
+        "cash_and_equivalents",
+        "total_debt",
+        "shareholders_equity",
+        "outstanding_shares",
+        "ebit",
+        "ebitda",
+    ],
+    period="annual",
+    limit=5,
+)
+
+
+def stanley_druckenmiller(prices, financial_line_items: FinancialDataset, company_news, insider_trades, market_cap):
     """
     Analyzes stocks using Stanley Druckenmiller's investing principles:
       - Seeking asymmetric risk-reward opportunities
@@ -84,7 +108,7 @@ def stanley_druckenmiller(prices,financial_line_items,company_news,insider_trade
     return analysis_data, intro_text, prompt
 
 
-def analyze_growth_and_momentum(financial_line_items: list, prices: list) -> dict:
+def analyze_growth_and_momentum(financial_line_items: FinancialDataset, prices: list) -> dict:
     """
     Evaluate:
       - Revenue Growth (YoY)
@@ -100,7 +124,7 @@ def analyze_growth_and_momentum(financial_line_items: list, prices: list) -> dic
     #
     # 1. Revenue Growth
     #
-    revenues = [fi.revenue for fi in financial_line_items if fi.revenue is not None]
+    revenues = financial_line_items.values("revenue")
     if len(revenues) >= 2:
         latest_rev = revenues[0]
         older_rev = revenues[-1]
@@ -125,7 +149,7 @@ def analyze_growth_and_momentum(financial_line_items: list, prices: list) -> dic
     #
     # 2. EPS Growth
     #
-    eps_values = [fi.earnings_per_share for fi in financial_line_items if fi.earnings_per_share is not None]
+    eps_values = financial_line_items.values("earnings_per_share")
     if len(eps_values) >= 2:
         latest_eps = eps_values[0]
         older_eps = eps_values[-1]
@@ -265,7 +289,7 @@ def analyze_sentiment(news_items: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
-def analyze_risk_reward(financial_line_items: list, market_cap: float | None, prices: list) -> dict:
+def analyze_risk_reward(financial_line_items: FinancialDataset, market_cap: float | None, prices: list) -> dict:
     """
     Assesses risk via:
       - Debt-to-Equity
@@ -281,8 +305,8 @@ def analyze_risk_reward(financial_line_items: list, market_cap: float | None, pr
     #
     # 1. Debt-to-Equity
     #
-    debt_values = [fi.total_debt for fi in financial_line_items if fi.total_debt is not None]
-    equity_values = [fi.shareholders_equity for fi in financial_line_items if fi.shareholders_equity is not None]
+    debt_values = financial_line_items.values("total_debt")
+    equity_values = financial_line_items.values("shareholders_equity")
 
     if debt_values and equity_values and len(debt_values) == len(equity_values) and len(debt_values) > 0:
         recent_debt = debt_values[0]
@@ -339,7 +363,7 @@ def analyze_risk_reward(financial_line_items: list, market_cap: float | None, pr
     return {"score": final_score, "details": "; ".join(details)}
 
 
-def analyze_druckenmiller_valuation(financial_line_items: list, market_cap: float | None) -> dict:
+def analyze_druckenmiller_valuation(financial_line_items: FinancialDataset, market_cap: float | None) -> dict:
     """
     Druckenmiller is willing to pay up for growth, but still checks:
       - P/E
@@ -355,14 +379,14 @@ def analyze_druckenmiller_valuation(financial_line_items: list, market_cap: floa
     raw_score = 0
 
     # Gather needed data
-    net_incomes = [fi.net_income for fi in financial_line_items if fi.net_income is not None]
-    fcf_values = [fi.free_cash_flow for fi in financial_line_items if fi.free_cash_flow is not None]
-    ebit_values = [fi.ebit for fi in financial_line_items if fi.ebit is not None]
-    ebitda_values = [fi.ebitda for fi in financial_line_items if fi.ebitda is not None]
+    net_incomes = financial_line_items.values("net_income")
+    fcf_values = financial_line_items.values("free_cash_flow")
+    ebit_values = financial_line_items.values("ebit")
+    ebitda_values = financial_line_items.values("ebitda")
 
     # For EV calculation, let's get the most recent total_debt & cash
-    debt_values = [fi.total_debt for fi in financial_line_items if fi.total_debt is not None]
-    cash_values = [fi.cash_and_equivalents for fi in financial_line_items if fi.cash_and_equivalents is not None]
+    debt_values = financial_line_items.values("total_debt")
+    cash_values = financial_line_items.values("cash_and_equivalents")
     recent_debt = debt_values[0] if debt_values else 0
     recent_cash = cash_values[0] if cash_values else 0
 
@@ -442,3 +466,17 @@ def analyze_druckenmiller_valuation(financial_line_items: list, market_cap: floa
 
     return {"score": final_score, "details": "; ".join(details)}
 
+
+AGENT = AgentSpec(
+    name="stanley_druckenmiller",
+    task=TaskName.STANLEY_DRUCKENMILLER,
+    run=stanley_druckenmiller,
+    inputs=[
+        AgentInput(dataset="prices"),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="company_news", limit=50),
+        AgentInput(dataset="insider_trades", limit=50),
+        AgentInput(dataset="market_cap"),
+    ],
+    llm=True,
+)
@@ -1,33 +1,40 @@
+import copy
 import math
+import os
 
 import pandas as pd
 import numpy as np
 
-from tools.api import prices_to_df
 from utils.ProgressBar import progress, ProgressStatus, TaskName
+from data.models import AgentInput, AgentSpec
+from strategy.indicators import TechnicalState
+from tools.cache import DEFAULT_CACHE_DIR
+
+# 各股票的增量指标状态保存在缓存目录下，之后每次只用新增的 K 线更新
+TECHNICAL_STATE_DIR = os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "technical_state")
+TECHNICAL_STATE_ENABLED = os.getenv("QUANTAI_TECHNICAL_STATE", "1").lower() not in ("0", "false", "no")
 
 
 ##### Technical Analyst #####
-def technical_analyst(prices):
+def technical_analyst(prices_df: pd.DataFrame, ticker: str | None = None):
 
-    if not prices:
+    if prices_df.empty:
         progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.ERROR, "Failed: No price data found")
 
-
-    # Convert prices to a DataFrame
-    prices_df = prices_to_df(prices)
+    progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING, "Updating indicators")
+    indicators = load_technical_state(ticker, prices_df).snapshot()
 
     progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING, "Calculating trend signals")
-    trend_signals = calculate_trend_signals(prices_df)
+    trend_signals = calculate_trend_signals(indicators)
 
     progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING, "Calculating mean reversion")
-    mean_reversion_signals = calculate_mean_reversion_signals(prices_df)
+    mean_reversion_signals = calculate_mean_reversion_signals(prices_df, indicators)
 
     progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING, "Calculating momentum")
     momentum_signals = calculate_momentum_signals(prices_df)
 
     progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING, "Analyzing volatility")
-    volatility_signals = calculate_volatility_signals(prices_df)
+    volatility_signals = calculate_volatility_signals(prices_df, indicators)
 
     progress.update(TaskName.TECHNICAL_ANALYST, ProgressStatus.WORKING, "Analyzing statistical arbitrage")
     stat_arb_signals = calculate_stat_arb_signals(prices_df)
@@ -89,29 +96,27 @@ def technical_analyst(prices):
     return technical_analysis
 
 
-def calculate_trend_signals(prices_df):
+def calculate_trend_signals(indicators: dict):
     """
     Advanced trend following strategy using multiple timeframes and indicators
     """
-    # Calculate EMAs for multiple timeframes
-    ema_8 = calculate_ema(prices_df, 8)
-    ema_21 = calculate_ema(prices_df, 21)
-    ema_55 = calculate_ema(prices_df, 55)
-
-    # Calculate ADX for trend strength
-    adx = calculate_adx(prices_df, 14)
+    # EMAs for multiple timeframes and ADX, from the incremental indicator state
+    ema_8 = indicators["ema_8"]
+    ema_21 = indicators["ema_21"]
+    ema_55 = indicators["ema_55"]
+    adx = indicators["adx"]
 
     # Determine trend direction and strength
     short_trend = ema_8 > ema_21
     medium_trend = ema_21 > ema_55
 
     # Combine signals with confidence weighting
-    trend_strength = adx["adx"].iloc[-1] / 100.0
+    trend_strength = adx / 100.0
 
-    if short_trend.iloc[-1] and medium_trend.iloc[-1]:
+    if short_trend and medium_trend:
         signal = "bullish"
         confidence = trend_strength
-    elif not short_trend.iloc[-1] and not medium_trend.iloc[-1]:
+    elif not short_trend and not medium_trend:
         signal = "bearish"
         confidence = trend_strength
     else:
@@ -122,38 +127,33 @@ def calculate_trend_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "adx": float(adx["adx"].iloc[-1]),
+            "adx": float(adx),
             "trend_strength": float(trend_strength),
         },
     }
 
 
-def calculate_mean_reversion_signals(prices_df):
+def calculate_mean_reversion_signals(prices_df, indicators: dict):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
     """
-    # Calculate z-score of price relative to moving average
-    ma_50 = prices_df["close"].rolling(window=50).mean()
-    std_50 = prices_df["close"].rolling(window=50).std()
-    z_score = (prices_df["close"] - ma_50) / std_50
-
-    # Calculate Bollinger Bands
-    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
-
-    # Calculate RSI with multiple timeframes
-    rsi_14 = calculate_rsi(prices_df, 14)
-    rsi_28 = calculate_rsi(prices_df, 28)
+    # z-score against the 50-day mean, Bollinger Bands and RSI from the incremental indicator state
+    z_score = indicators["z_score"]
+    bb_upper = indicators["bb_upper"]
+    bb_lower = indicators["bb_lower"]
+    rsi_14 = indicators["rsi_14"]
+    rsi_28 = indicators["rsi_28"]
 
     # Mean reversion signals
-    price_vs_bb = (prices_df["close"].iloc[-1] - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
+    price_vs_bb = (prices_df["close"].iloc[-1] - bb_lower) / (bb_upper - bb_lower)
 
     # Combine signals
-    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+    if z_score < -2 and price_vs_bb < 0.2:
         signal = "bullish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
-    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+        confidence = min(abs(z_score) / 4, 1.0)
+    elif z_score > 2 and price_vs_bb > 0.8:
         signal = "bearish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+        confidence = min(abs(z_score) / 4, 1.0)
     else:
         signal = "neutral"
         confidence = 0.5
@@ -162,14 +162,53 @@ def calculate_mean_reversion_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "z_score": float(z_score.iloc[-1]),
+            "z_score": float(z_score),
             "price_vs_bb": float(price_vs_bb),
-            "rsi_14": float(rsi_14.iloc[-1]),
-            "rsi_28": float(rsi_28.iloc[-1]),
+            "rsi_14": float(rsi_14),
+            "rsi_28": float(rsi_28),
         },
     }
 
 
+def load_technical_state(ticker: str | None, prices_df: pd.DataFrame) -> TechnicalState:
+    """
+    The ticker's incremental indicators brought up to the last bar of prices_df.
+
+    The saved state is checkpointed at the second-to-last bar: the last one may
+    still be trading and is revised on later fetches, so it is applied to a
+    copy that is never saved. A checkpoint inside the frame is only fed the
+    bars after it; otherwise (cold start, or a frame that does not reach back
+    to it) the state is seeded from the frame. Without a ticker nothing is
+    loaded or saved.
+    """
+    path = None
+    if ticker and TECHNICAL_STATE_ENABLED:
+        path = os.path.join(TECHNICAL_STATE_DIR, ticker.upper() + ".json")
+    state = None
+    if path is not None:
+        try:
+            state = TechnicalState.load(path)
+        except (OSError, ValueError, KeyError):
+            # 没有保存过或文件损坏时从头计算
+            state = None
+
+    closed, latest = prices_df.iloc[:-1], prices_df.iloc[-1:]
+    if state is not None and state.last_time is not None and (closed["time"] == state.last_time).any():
+        new_bars = closed[closed["time"] > state.last_time]
+        for time, high, low, close in zip(new_bars["time"], new_bars["high"], new_bars["low"], new_bars["close"]):
+            state.update(time, high, low, close)
+        changed = not new_bars.empty
+    else:
+        # 状态领先于本次数据或与之衔接不上时，用本次数据重新初始化
+        state = TechnicalState().seed(closed)
+        changed = True
+
+    if path is not None and changed and state.last_time is not None:
+        state.save(path)
+    # 最新一根 K 线只加到临时副本上，盘中重算或收盘后修订时都从检查点重新计算
+    return copy.deepcopy(state).seed(latest)
+
+
 def calculate_momentum_signals(prices_df):
     """
     Multi-factor momentum strategy
@@ -215,7 +254,7 @@ def calculate_momentum_signals(prices_df):
     }
 
 
-def calculate_volatility_signals(prices_df):
+def calculate_volatility_signals(prices_df, indicators: dict):
     """
     Volatility-based trading strategy
     """
@@ -233,8 +272,7 @@ def calculate_volatility_signals(prices_df):
     vol_z_score = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
 
     # ATR ratio
-    atr = calculate_atr(prices_df)
-    atr_ratio = atr / prices_df["close"]
+    atr_ratio = indicators["atr"] / prices_df["close"].iloc[-1]
 
     # Generate signal based on volatility regime
     current_vol_regime = vol_regime.iloc[-1]
@@ -257,7 +295,7 @@ def calculate_volatility_signals(prices_df):
             "historical_volatility": float(hist_vol.iloc[-1]),
             "volatility_regime": float(current_vol_regime),
             "volatility_z_score": float(vol_z),
-            "atr_ratio": float(atr_ratio.iloc[-1]),
+            "atr_ratio": float(atr_ratio),
         },
     }
 
@@ -394,25 +432,26 @@ def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
         DataFrame with ADX values
     """
     # Calculate True Range
-    df["high_low"] = df["high"] - df["low"]
-    df["high_close"] = abs(df["high"] - df["close"].shift())
-    df["low_close"] = abs(df["low"] - df["close"].shift())
-    df["tr"] = df[["high_low", "high_close", "low_close"]].max(axis=1)
+    # 只在局部 Series 上计算，不改动调用方传入（可能被多个策略共享）的 DataFrame
+    high_low = df["high"] - df["low"]
+    high_close = abs(df["high"] - df["close"].shift())
+    low_close = abs(df["low"] - df["close"].shift())
+    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
 
     # Calculate Directional Movement
-    df["up_move"] = df["high"] - df["high"].shift()
-    df["down_move"] = df["low"].shift() - df["low"]
+    up_move = df["high"] - df["high"].shift()
+    down_move = df["low"].shift() - df["low"]
 
-    df["plus_dm"] = np.where((df["up_move"] > df["down_move"]) & (df["up_move"] > 0), df["up_move"], 0)
-    df["minus_dm"] = np.where((df["down_move"] > df["up_move"]) & (df["down_move"] > 0), df["down_move"], 0)
+    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=df.index)
+    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=df.index)
 
     # Calculate ADX
-    df["+di"] = 100 * (df["plus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean())
-    df["-di"] = 100 * (df["minus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean())
-    df["dx"] = 100 * abs(df["+di"] - df["-di"]) / (df["+di"] + df["-di"])
-    df["adx"] = df["dx"].ewm(span=period).mean()
+    plus_di = 100 * (plus_dm.ewm(span=period).mean() / tr.ewm(span=period).mean())
+    minus_di = 100 * (minus_dm.ewm(span=period).mean() / tr.ewm(span=period).mean())
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    adx = dx.ewm(span=period).mean()
 
-    return df[["adx", "+di", "-di"]]
+    return pd.DataFrame({"adx": adx, "+di": plus_di, "-di": minus_di})
 
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
@@ -451,8 +490,13 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
         float: Hurst exponent
     """
     lags = range(2, max_lag)
+    # 按位置错开相减；直接对 Series 相减会按索引对齐，差值几乎全为 0
+    values = np.asarray(price_series, dtype=float)
+    if len(values) < max_lag:
+        # 数据不够覆盖最大滞后期，按随机游走处理
+        return 0.5
     # Add small epsilon to avoid log(0)
-    tau = [max(1e-8, np.sqrt(np.std(np.subtract(price_series[lag:], price_series[:-lag])))) for lag in lags]
+    tau = [max(1e-8, np.sqrt(np.std(values[lag:] - values[:-lag]))) for lag in lags]
 
     # Return the Hurst exponent from linear fit
     try:
@@ -461,3 +505,14 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
     except (ValueError, RuntimeWarning):
         # Return 0.5 (random walk) if calculation fails
         return 0.5
+
+
+AGENT = AgentSpec(
+    name="technical_analyst",
+    task=TaskName.TECHNICAL_ANALYST,
+    run=technical_analyst,
+    inputs=[
+        AgentInput(dataset="price_frame"),
+        AgentInput(dataset="ticker"),
+    ],
+)
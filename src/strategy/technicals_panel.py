@@ -0,0 +1,286 @@
+import math
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from strategy.technicals import weighted_signal_combination
+
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+##### Panel Technical Analyst #####
+def prices_to_panel(prices_by_ticker: dict[str, list]) -> tuple[list[str], dict[str, np.ndarray]]:
+    """
+    Build a (bars x tickers) OHLCV panel from per-ticker Price lists.
+
+    Each ticker's bars are sorted by time and right-aligned, so the last row is
+    every ticker's latest bar and shorter histories are NaN-padded at the top.
+    This keeps the panel results identical to running each ticker on its own.
+    """
+    tickers = list(prices_by_ticker)
+    length = max((len(prices) for prices in prices_by_ticker.values()), default=0)
+    panel = {field: np.full((length, len(tickers)), np.nan) for field in PANEL_FIELDS}
+    for j, ticker in enumerate(tickers):
+        rows = sorted(prices_by_ticker[ticker], key=lambda p: p.time)
+        if not rows:
+            continue
+        offset = length - len(rows)
+        for field in PANEL_FIELDS:
+            panel[field][offset:, j] = [getattr(p, field) for p in rows]
+    return tickers, panel
+
+
+def technical_analyst_panel(tickers: list[str], panel: dict[str, np.ndarray]) -> dict[str, dict]:
+    """
+    Vectorized technical_analyst: computes every indicator for all tickers at once
+    and returns {ticker: analysis} with the same structure as technical_analyst.
+
+    Indicators follow the pandas definitions used in strategy.technicals
+    (EMA adjust=False, ADX on span-EWMs, simple-mean RSI/ATR, sample std/skew/kurt).
+    Only the trailing windows needed for the latest signal are evaluated.
+    """
+    close = panel["close"]
+    high = panel["high"]
+    low = panel["low"]
+    volume = panel["volume"]
+    if close.shape[0] == 0:
+        return {}
+
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        missing = np.isnan(close)
+        prev_close = _shift(close)
+        returns = close / prev_close - 1
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+        # Trend: EMA crossovers + ADX
+        ema_8 = _ema_last(close, 8)
+        ema_21 = _ema_last(close, 21)
+        ema_55 = _ema_last(close, 55)
+        up_move = high - _shift(high)
+        down_move = _shift(low) - low
+        plus_dm = np.where(missing, np.nan, np.where((up_move > down_move) & (up_move > 0), up_move, 0.0))
+        minus_dm = np.where(missing, np.nan, np.where((down_move > up_move) & (down_move > 0), down_move, 0.0))
+        smoothed_tr = _ewm_adjusted(true_range, 14)
+        plus_di = 100 * _ewm_adjusted(plus_dm, 14) / smoothed_tr
+        minus_di = 100 * _ewm_adjusted(minus_dm, 14) / smoothed_tr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = _ewm_adjusted(dx, 14)[-1]
+
+        # Mean reversion: z-score, Bollinger, RSI
+        last_close = close[-1]
+        z_score = (last_close - _window(close, 50).mean(axis=0)) / _window(close, 50).std(axis=0, ddof=1)
+        sma_20 = _window(close, 20).mean(axis=0)
+        std_20 = _window(close, 20).std(axis=0, ddof=1)
+        bb_upper = sma_20 + std_20 * 2
+        bb_lower = sma_20 - std_20 * 2
+        price_vs_bb = (last_close - bb_lower) / (bb_upper - bb_lower)
+        delta = close - prev_close
+        gain = np.where(missing, np.nan, np.where(delta > 0, delta, 0.0))
+        loss = np.where(missing, np.nan, np.where(delta < 0, -delta, 0.0))
+        rsi_14 = _rsi_last(gain, loss, 14)
+        rsi_28 = _rsi_last(gain, loss, 28)
+
+        # Momentum
+        mom_1m = _window(returns, 21).sum(axis=0)
+        mom_3m = _window(returns, 63).sum(axis=0)
+        mom_6m = _window(returns, 126).sum(axis=0)
+        volume_momentum = volume[-1] / _window(volume, 21).mean(axis=0)
+        momentum_score = 0.4 * mom_1m + 0.3 * mom_3m + 0.3 * mom_6m
+
+        # Volatility regime
+        hist_vol_tail = _rolling_std_tail(returns, 21, 63) * math.sqrt(252)
+        hist_vol = hist_vol_tail[-1]
+        vol_ma = hist_vol_tail.mean(axis=0)
+        vol_regime = hist_vol / vol_ma
+        vol_z_score = (hist_vol - vol_ma) / hist_vol_tail.std(axis=0, ddof=1)
+        atr_ratio = _window(true_range, 14).mean(axis=0) / last_close
+
+        # Statistical properties
+        skew, kurt = _skew_kurt_last(returns, 63)
+        hurst = _hurst_exponent(close)
+
+    strategy_weights = {
+        "trend": 0.25,
+        "mean_reversion": 0.20,
+        "momentum": 0.25,
+        "volatility": 0.15,
+        "stat_arb": 0.15,
+    }
+
+    results = {}
+    for j, ticker in enumerate(tickers):
+        trend_strength = adx[j] / 100.0
+        short_trend = ema_8[j] > ema_21[j]
+        medium_trend = ema_21[j] > ema_55[j]
+        if short_trend and medium_trend:
+            trend = _signal("bullish", trend_strength)
+        elif not short_trend and not medium_trend:
+            trend = _signal("bearish", trend_strength)
+        else:
+            trend = _signal("neutral", 0.5)
+        trend["metrics"] = {"adx": float(adx[j]), "trend_strength": float(trend_strength)}
+
+        if z_score[j] < -2 and price_vs_bb[j] < 0.2:
+            mean_reversion = _signal("bullish", min(abs(z_score[j]) / 4, 1.0))
+        elif z_score[j] > 2 and price_vs_bb[j] > 0.8:
+            mean_reversion = _signal("bearish", min(abs(z_score[j]) / 4, 1.0))
+        else:
+            mean_reversion = _signal("neutral", 0.5)
+        mean_reversion["metrics"] = {
+            "z_score": float(z_score[j]),
+            "price_vs_bb": float(price_vs_bb[j]),
+            "rsi_14": float(rsi_14[j]),
+            "rsi_28": float(rsi_28[j]),
+        }
+
+        volume_confirmation = volume_momentum[j] > 1.0
+        if momentum_score[j] > 0.05 and volume_confirmation:
+            momentum = _signal("bullish", min(abs(momentum_score[j]) * 5, 1.0))
+        elif momentum_score[j] < -0.05 and volume_confirmation:
+            momentum = _signal("bearish", min(abs(momentum_score[j]) * 5, 1.0))
+        else:
+            momentum = _signal("neutral", 0.5)
+        momentum["metrics"] = {
+            "momentum_1m": float(mom_1m[j]),
+            "momentum_3m": float(mom_3m[j]),
+            "momentum_6m": float(mom_6m[j]),
+            "volume_momentum": float(volume_momentum[j]),
+        }
+
+        if vol_regime[j] < 0.8 and vol_z_score[j] < -1:
+            volatility = _signal("bullish", min(abs(vol_z_score[j]) / 3, 1.0))
+        elif vol_regime[j] > 1.2 and vol_z_score[j] > 1:
+            volatility = _signal("bearish", min(abs(vol_z_score[j]) / 3, 1.0))
+        else:
+            volatility = _signal("neutral", 0.5)
+        volatility["metrics"] = {
+            "historical_volatility": float(hist_vol[j]),
+            "volatility_regime": float(vol_regime[j]),
+            "volatility_z_score": float(vol_z_score[j]),
+            "atr_ratio": float(atr_ratio[j]),
+        }
+
+        if hurst[j] < 0.4 and skew[j] > 1:
+            stat_arb = _signal("bullish", (0.5 - hurst[j]) * 2)
+        elif hurst[j] < 0.4 and skew[j] < -1:
+            stat_arb = _signal("bearish", (0.5 - hurst[j]) * 2)
+        else:
+            stat_arb = _signal("neutral", 0.5)
+        stat_arb["metrics"] = {
+            "hurst_exponent": float(hurst[j]),
+            "skewness": float(skew[j]),
+            "kurtosis": float(kurt[j]),
+        }
+
+        signals = {
+            "trend": trend,
+            "mean_reversion": mean_reversion,
+            "momentum": momentum,
+            "volatility": volatility,
+            "stat_arb": stat_arb,
+        }
+        combined_signal = weighted_signal_combination(signals, strategy_weights)
+        results[ticker] = {
+            "signal": combined_signal["signal"],
+            "confidence": round(combined_signal["confidence"] * 100),
+            "strategy_signals": {
+                report_name: {
+                    "signal": signals[name]["signal"],
+                    "confidence": round(signals[name]["confidence"] * 100),
+                    "metrics": signals[name]["metrics"],
+                }
+                for report_name, name in (
+                    ("trend_following", "trend"),
+                    ("mean_reversion", "mean_reversion"),
+                    ("momentum", "momentum"),
+                    ("volatility", "volatility"),
+                    ("statistical_arbitrage", "stat_arb"),
+                )
+            },
+        }
+    return results
+
+
+def _signal(signal: str, confidence: float) -> dict:
+    # 数据不足时指标为 NaN，置信度按 0 处理，避免 round(NaN) 报错
+    confidence = float(confidence)
+    return {"signal": signal, "confidence": confidence if math.isfinite(confidence) else 0.0}
+
+
+def _shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+def _window(x: np.ndarray, window: int) -> np.ndarray:
+    """Last `window` rows, NaN-padded when the history is shorter (rolling min_periods=window)."""
+    if x.shape[0] >= window:
+        return x[-window:]
+    padding = np.full((window - x.shape[0], x.shape[1]), np.nan)
+    return np.vstack([padding, x])
+
+
+def _rolling_std_tail(x: np.ndarray, window: int, periods: int) -> np.ndarray:
+    """rolling(window).std() for the last `periods` rows, shape (periods, tickers)."""
+    windows = sliding_window_view(_window(x, window + periods - 1), window, axis=0)
+    return windows.std(axis=-1, ddof=1)
+
+
+def _ema_last(x: np.ndarray, span: int) -> np.ndarray:
+    """Latest value of ewm(span=span, adjust=False).mean()."""
+    alpha = 2 / (span + 1)
+    ema = np.full(x.shape[1], np.nan)
+    for row in x:
+        updated = np.where(np.isnan(ema), row, (1 - alpha) * ema + alpha * row)
+        ema = np.where(np.isnan(row), ema, updated)
+    return ema
+
+
+def _ewm_adjusted(x: np.ndarray, span: int) -> np.ndarray:
+    """ewm(span=span).mean() with pandas' default adjust=True; NaNs are skipped but still decay the weights."""
+    decay = 1 - 2 / (span + 1)
+    numerator = np.zeros(x.shape[1])
+    denominator = np.zeros(x.shape[1])
+    out = np.empty_like(x)
+    for t, row in enumerate(x):
+        valid = ~np.isnan(row)
+        numerator = decay * numerator + np.where(valid, row, 0.0)
+        denominator = decay * denominator + valid
+        out[t] = np.where(denominator > 0, numerator / denominator, np.nan)
+    return out
+
+
+def _rsi_last(gain: np.ndarray, loss: np.ndarray, period: int) -> np.ndarray:
+    rs = _window(gain, period).mean(axis=0) / _window(loss, period).mean(axis=0)
+    return 100 - (100 / (1 + rs))
+
+
+def _skew_kurt_last(x: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Bias-corrected skewness and excess kurtosis of the last window, as rolling().skew()/kurt()."""
+    values = _window(x, window)
+    n = window
+    deviations = values - values.mean(axis=0)
+    m2 = (deviations ** 2).mean(axis=0)
+    m3 = (deviations ** 3).mean(axis=0)
+    m4 = (deviations ** 4).mean(axis=0)
+    skew = math.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+    kurt = (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * m4 / m2 ** 2 - 3 * (n - 1))
+    return skew, kurt
+
+
+def _hurst_exponent(close: np.ndarray, max_lag: int = 20) -> np.ndarray:
+    """
+    Hurst exponent per ticker from the slope of log(sqrt(std(lagged differences))) vs log(lag).
+    Differences are taken positionally on the raw arrays; tickers without enough data get 0.5.
+    """
+    lags = np.arange(2, max_lag)
+    log_tau = np.empty((len(lags), close.shape[1]))
+    for i, lag in enumerate(lags):
+        std = np.nanstd(close[lag:] - close[:-lag], axis=0)
+        log_tau[i] = np.log(np.maximum(1e-8, np.sqrt(std)))
+    x = np.log(lags) - np.log(lags).mean()
+    slope = (x[:, None] * (log_tau - log_tau.mean(axis=0))).sum(axis=0) / (x ** 2).sum()
+    return np.where(np.isfinite(slope), slope, 0.5)
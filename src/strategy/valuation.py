@@ -1,16 +1,33 @@
 
 
+import sys
+
 from tools.api import get_financial_metrics, get_market_cap, search_line_items
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset, FinancialMetrics
+from utils.ProgressBar import TaskName
+
+
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "free_cash_flow",
+        "net_income",
+        "depreciation_and_amortization",
+        "capital_expenditure",
+        "working_capital",
+    ],
+    period="ttm",
+    limit=2,
+)
 
 
-def valuation(financial_metrics,financial_line_items,market_cap):
+def valuation(financial_metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, market_cap):
     """Performs detailed valuation analysis using multiple methodologies for multiple tickers."""
     # Fetch the financial metrics
 
 
     # Add safety check for financial metrics
     if not financial_metrics:
-        print("No financial metrics available")
+        print("No financial metrics available", file=sys.stderr)
 
     metrics = financial_metrics[0]
 
@@ -19,7 +36,7 @@ def valuation(financial_metrics,financial_line_items,market_cap):
 
     # Add safety check for financial line items
     if len(financial_line_items) < 2:
-        print("No financial data found")
+        print("No financial data found", file=sys.stderr)
 
 
     # Pull the current and previous financial line items
@@ -190,3 +207,15 @@ def calculate_working_capital_change(
         float: Change in working capital (current - previous)
     """
     return current_working_capital - previous_working_capital
+
+
+AGENT = AgentSpec(
+    name="valuation",
+    task=TaskName.VALUATION,
+    run=valuation,
+    inputs=[
+        AgentInput(dataset="metrics", period="ttm", limit=10),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="market_cap"),
+    ],
+)
@@ -1,5 +1,23 @@
-
-def warren_buffett(metrics,financial_line_items,market_cap):
+from data.models import LineItemRequirement, AgentInput, AgentSpec, FinancialDataset, FinancialMetrics
+from utils.ProgressBar import TaskName
+
+LINE_ITEMS = LineItemRequirement(
+    line_items=[
+        "capital_expenditure",
+        "depreciation_and_amortization",
+        "net_income",
+        "outstanding_shares",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "issuance_or_purchase_of_equity_shares",
+    ],
+    period="ttm",
+    limit=10,
+)
+
+
+def warren_buffett(metrics: list[FinancialMetrics], financial_line_items: FinancialDataset, market_cap):
 
     # Analyze fundamentals
     fundamental_analysis = analyze_fundamentals(metrics)
@@ -77,7 +95,7 @@ def warren_buffett(metrics,financial_line_items,market_cap):
     return analysis_data, intro_text, prompt
 
 
-def analyze_fundamentals(metrics: list) -> dict[str, any]:
+def analyze_fundamentals(metrics: list[FinancialMetrics]) -> dict[str, any]:
     """Analyze company fundamentals based on Buffett's criteria."""
     if not metrics:
         return {"score": 0, "details": "Insufficient fundamental data"}
@@ -126,7 +144,7 @@ def analyze_fundamentals(metrics: list) -> dict[str, any]:
     return {"score": score, "details": "; ".join(reasoning), "metrics": latest_metrics.model_dump()}
 
 
-def analyze_consistency(financial_line_items: list) -> dict[str, any]:
+def analyze_consistency(financial_line_items: FinancialDataset) -> dict[str, any]:
     """Analyze earnings consistency and growth."""
     if len(financial_line_items) < 4:  # Need at least 4 periods for trend analysis
         return {"score": 0, "details": "Insufficient historical data"}
@@ -135,7 +153,7 @@ def analyze_consistency(financial_line_items: list) -> dict[str, any]:
     reasoning = []
 
     # Check earnings growth trend
-    earnings_values = [item.net_income for item in financial_line_items if item.net_income]
+    earnings_values = financial_line_items.values("net_income", nonzero=True)
     if len(earnings_values) >= 4:
         # Simple check: is each period's earnings bigger than the next?
         earnings_growth = all(earnings_values[i] > earnings_values[i + 1] for i in range(len(earnings_values) - 1))
@@ -159,7 +177,7 @@ def analyze_consistency(financial_line_items: list) -> dict[str, any]:
     }
 
 
-def analyze_moat(metrics: list) -> dict[str, any]:
+def analyze_moat(metrics: list[FinancialMetrics]) -> dict[str, any]:
     """
     Evaluate whether the company likely has a durable competitive advantage (moat).
     For simplicity, we look at stability of ROE/operating margins over multiple periods
@@ -209,7 +227,7 @@ def analyze_moat(metrics: list) -> dict[str, any]:
     }
 
 
-def analyze_management_quality(financial_line_items: list) -> dict[str, any]:
+def analyze_management_quality(financial_line_items: FinancialDataset) -> dict[str, any]:
     """
     Checks for share dilution or consistent buybacks, and some dividend track record.
     A simplified approach:
@@ -249,7 +267,7 @@ def analyze_management_quality(financial_line_items: list) -> dict[str, any]:
     }
 
 
-def calculate_owner_earnings(financial_line_items: list) -> dict[str, any]:
+def calculate_owner_earnings(financial_line_items: FinancialDataset) -> dict[str, any]:
     """Calculate owner earnings (Buffett's preferred measure of true earnings power).
     Owner Earnings = Net Income + Depreciation - Maintenance CapEx"""
     if not financial_line_items or len(financial_line_items) < 1:
@@ -275,7 +293,7 @@ def calculate_owner_earnings(financial_line_items: list) -> dict[str, any]:
     }
 
 
-def calculate_intrinsic_value(financial_line_items: list) -> dict[str, any]:
+def calculate_intrinsic_value(financial_line_items: FinancialDataset) -> dict[str, any]:
     """Calculate intrinsic value using DCF with owner earnings."""
     if not financial_line_items:
         return {"intrinsic_value": None, "details": ["Insufficient data for valuation"]}
@@ -324,3 +342,15 @@ def calculate_intrinsic_value(financial_line_items: list) -> dict[str, any]:
         "details": ["Intrinsic value calculated using DCF model with owner earnings"],
     }
 
+
+AGENT = AgentSpec(
+    name="warren_buffett",
+    task=TaskName.WARREN_BUFFETT,
+    run=warren_buffett,
+    inputs=[
+        AgentInput(dataset="metrics", period="ttm", limit=5),
+        AgentInput(dataset="line_items", line_items=LINE_ITEMS),
+        AgentInput(dataset="market_cap"),
+    ],
+    llm=True,
+)
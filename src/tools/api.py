@@ -1,15 +1,27 @@
+import datetime
+import functools
+import inspect
 import json
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import requests
 
 from data.models import *
-from typing import Optional
-
-proxies = {
-    'http': 'http://127.0.0.1:7890',
-    'https':'https://127.0.0.1:7890',
-}
+from tools.cache import api_cache, cache_key, endpoint_ttl, llm_cache, request_memo
+from tools.cassette import cassette
+from tools.http_client import get_client
+from tools.sync import NATURAL_KEYS, incremental_store
+from tools.warehouse import PRICE_COLUMNS, price_columns_from_rows, price_rows_from_columns, price_warehouse
+from typing import Callable, Optional, get_args
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，没有时退回标准库 json
+    orjson = None
 
 def extract_json_from_deepseek_response(content: str) -> Optional[dict]:
     try:
@@ -21,49 +33,225 @@ def extract_json_from_deepseek_response(content: str) -> Optional[dict]:
                 json_text = json_text[:json_end].strip()
                 return json.loads(json_text)
     except Exception as e:
-        print(f"Error extracting JSON from Deepseek response: {e}")
+        print(f"Error extracting JSON from Deepseek response: {e}", file=sys.stderr)
     return None
 
 
-def call_deepseek(
-    prompt: str,
-    user_message: str,
+# DEEPSEEK_BASE_URL 环境变量可覆盖，例如指向 tools.mock_server 做离线压测
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+DEEPSEEK_MAX_CONNECTIONS = int(os.getenv("DEEPSEEK_MAX_CONNECTIONS", "16"))
+# temperature > 0 时回复本身是随机的，默认不缓存；设置该变量后同样复用缓存
+DEEPSEEK_CACHE_NONDETERMINISTIC = os.getenv("DEEPSEEK_CACHE_NONDETERMINISTIC", "").lower() in ("1", "true", "yes")
 
-) -> Optional[dict]:
-    from openai import OpenAI
+_deepseek_client = None
+_deepseek_lock = threading.Lock()
 
-    client = OpenAI(api_key=os.getenv("DEEPSEEK_API_KEY"), base_url="https://api.deepseek.com")
 
-    response = client.chat.completions.create(
-        model="deepseek-chat",
-        messages=[
+def _deepseek_http_options() -> dict:
+    import httpx
+
+    options = {
+        "limits": httpx.Limits(
+            max_connections=DEEPSEEK_MAX_CONNECTIONS,
+            max_keepalive_connections=DEEPSEEK_MAX_CONNECTIONS,
+            keepalive_expiry=120,
+        ),
+    }
+    # HTTP/2 需要安装 h2，未安装时退回 HTTP/1.1
+    if os.getenv("DEEPSEEK_HTTP2", "").lower() in ("1", "true", "yes"):
+        try:
+            import h2  # noqa: F401
+            options["http2"] = True
+        except ImportError:
+            pass
+    return options
+
+
+def get_deepseek_client():
+    """Process-wide OpenAI client for DeepSeek, created once so its connection pool is reused."""
+    global _deepseek_client
+    if _deepseek_client is None:
+        with _deepseek_lock:
+            if _deepseek_client is None:
+                from openai import DefaultHttpxClient, OpenAI
+
+                _deepseek_client = OpenAI(
+                    api_key=os.getenv("DEEPSEEK_API_KEY"),
+                    base_url=os.getenv("DEEPSEEK_BASE_URL") or DEEPSEEK_BASE_URL,
+                    http_client=DefaultHttpxClient(**_deepseek_http_options()),
+                )
+    return _deepseek_client
+
+
+def _deepseek_request(prompt: str, user_message: str, timeout: float | None) -> dict:
+    return {
+        "model": "deepseek-chat",
+        "messages": [
             {"role": "system", "content": prompt},
             {"role": "user", "content": user_message},
         ],
-        max_tokens=1024,
-        temperature=0.7,
-        stream=False
-    )
+        "max_tokens": 1024,
+        "temperature": 0.7,
+        "stream": False,
+        "timeout": timeout,
+    }
 
-    return extract_json_from_deepseek_response(response.choices[0].message.content)
 
+def _deepseek_request_body(request: dict) -> dict:
+    """The parts of a completion request that determine the answer."""
+    return {name: request[name] for name in ("model", "messages", "temperature", "max_tokens")}
 
 
+def _deepseek_cache_key(request: dict) -> Optional[str]:
+    """Cache key for a completion request, or None when the request is not cacheable."""
+    if request["temperature"] > 0 and not DEEPSEEK_CACHE_NONDETERMINISTIC:
+        return None
+    return cache_key("deepseek/chat/completions", _deepseek_request_body(request))
 
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
+def _cached_deepseek_content(request: dict, key: Optional[str]) -> Optional[str]:
+    """Answer from the cassette when replaying, else from the LLM cache (skipped while recording)."""
+    if cassette.replaying:
+        body = _deepseek_request_body(request)
+        return cassette.replay("llm", cache_key("deepseek/chat/completions", body))[1]
+    if key is not None and not cassette.recording:
+        return llm_cache.get(key)
+    return None
+
+
+def _cache_deepseek_content(request: dict, key: Optional[str], content: str) -> Optional[dict]:
+    body = _deepseek_request_body(request)
+    cassette.record("llm", cache_key("deepseek/chat/completions", body), body, content)
+    result = extract_json_from_deepseek_response(content)
+    # 只缓存能解析出结果的回复，解析失败时下次重新请求
+    if key is not None and result is not None:
+        llm_cache.set(key, content)
+    return result
 
-    url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
+
+def call_deepseek(
+    prompt: str,
+    user_message: str,
+    timeout: float | None = None,
+) -> Optional[dict]:
+    request = _deepseek_request(prompt, user_message, timeout)
+    key = _deepseek_cache_key(request)
+    if (content := _cached_deepseek_content(request, key)) is not None:
+        return extract_json_from_deepseek_response(content)
+
+    client = get_deepseek_client()
+    response = client.chat.completions.create(**request)
+    return _cache_deepseek_content(request, key, response.choices[0].message.content)
+
+
+# 受信任的批量数据跳过逐字段校验，只抽样校验（默认关闭）
+TRUSTED_INGEST = os.getenv("QUANTAI_TRUSTED_INGEST", "").lower() in ("1", "true", "yes")
+VALIDATION_SAMPLE_RATE = float(os.getenv("QUANTAI_VALIDATION_SAMPLE_RATE", "0.01"))
+
+
+def _parse_rows(data: dict, response_model: type[BaseModel], field: str) -> list:
+    """
+    Rows of a list response. By default the whole payload goes through
+    `response_model` as before; with QUANTAI_TRUSTED_INGEST the rows are built
+    by construct_rows, validating only a VALIDATION_SAMPLE_RATE sample.
+    """
+    if not TRUSTED_INGEST:
+        return getattr(response_model(**data), field)
+    row_model = get_args(response_model.model_fields[field].annotation)[0]
+    return construct_rows(row_model, data.get(field) or [], VALIDATION_SAMPLE_RATE)
+
+
+def _request_json(ticker: str, endpoint: str, params: dict, method: str = "GET", use_cache: bool = True) -> dict:
+    """
+    Fetch one financialdatasets endpoint, serving it from the on-disk cache when possible.
+    GET params go in the query string, POST params are sent as the JSON body.
+    """
+    key = cache_key(endpoint, params)
+    if cassette.replaying:
+        status, data = cassette.replay("http", key)
+        if status != 200:
+            raise Exception(f"Error fetching data: {ticker} - {status} - {data}")
+        return data
+
+    # 录制时必须真实发出请求，不读缓存
+    data = api_cache.get(key) if use_cache and not cassette.recording else None
+    if data is not None:
+        return data
+
+    response = get_client().request(method, endpoint, params)
+    request = {"method": method, "endpoint": endpoint, "params": params}
     if response.status_code != 200:
+        cassette.record("http", key, request, response.text, response.status_code)
         raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
 
+    data = orjson.loads(response.content) if TRUSTED_INGEST and orjson is not None else response.json()
+    cassette.record("http", key, request, data)
+    if use_cache:
+        api_cache.set(key, data, endpoint_ttl(endpoint, params))
+    return data
+
+
+def memoized(func):
+    """
+    Memoize a fetcher in request_memo, keyed by its fully bound arguments, so
+    get_financial_metrics(t, d) and get_financial_metrics(t, d, "ttm", 10) share one call.
+    """
+    signature = inspect.signature(func)
+
+    def memo_key(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__,) + tuple(
+            tuple(value) if isinstance(value, list) else value for value in bound.arguments.values()
+        )
+        return key, bound.arguments.get("ticker")
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key, ticker = memo_key(*args, **kwargs)
+        return request_memo.call(key, ticker, lambda: func(*args, **kwargs))
+
+    def seed(value, *args, **kwargs):
+        """Record `value` as the result of wrapper(*args, **kwargs) without calling it."""
+        key, ticker = memo_key(*args, **kwargs)
+        request_memo.seed(key, ticker, value)
+
+    wrapper.seed = seed
+    return wrapper
+
+
+def _fetch_price_rows(ticker: str, start_date: str, end_date: str, use_cache: bool = True) -> list[dict]:
+    params = {
+        "ticker": ticker,
+        "interval": "day",
+        "interval_multiplier": 1,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    return _request_json(ticker, "/prices/", params, use_cache=use_cache).get("prices") or []
+
+
+@memoized
+def get_price_columns(ticker: str, start_date: str, end_date: str) -> dict[str, np.ndarray]:
+    """
+    Daily bars as typed columns, shared by get_prices and get_price_frame so they
+    cost one lookup. Served from the local price warehouse when it is enabled
+    (only missing date gaps hit the API), otherwise straight from the API.
+    """
+    # 录制/回放时绕过本地仓库，保证发出的请求与本地状态无关
+    if price_warehouse.enabled and not cassette.active:
+        # 仓库本身就是持久化存储，不再经过 JSON 磁盘缓存
+        return price_warehouse.get(ticker, start_date, end_date,
+                                   lambda start, end: _fetch_price_rows(ticker, start, end, use_cache=False))
+    return price_columns_from_rows(_fetch_price_rows(ticker, start_date, end_date))
+
+
+@memoized
+def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    data = {"ticker": ticker, "prices": price_rows_from_columns(get_price_columns(ticker, start_date, end_date))}
+
     # Parse response with Pydantic model
-    price_response = PriceResponse(**response.json())
-    prices = price_response.prices
+    prices = _parse_rows(data, PriceResponse, "prices")
 
     if not prices:
         return []
@@ -76,25 +264,24 @@ def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
 
 # 历史数据
 # 获取某个股票代码的财务指标，包括估值、盈利能力、效率、流动性、杠杆、增长以及每股指标。
+@memoized
 def get_financial_metrics(
     ticker: str,
     end_date: str,
     period: str = "ttm",
     limit: int = 10,
 ) -> list[FinancialMetrics]:
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+    params = {
+        "ticker": ticker,
+        "report_period_lte": end_date,
+        "limit": limit,
+        "period": period,
+    }
+    data = _request_json(ticker, "/financial-metrics/", params)
 
     # Parse response with Pydantic model
-    metrics_response = FinancialMetricsResponse(**response.json())
     # Return the FinancialMetrics objects directly instead of converting to dict
-    financial_metrics = metrics_response.financial_metrics
+    financial_metrics = _parse_rows(data, FinancialMetricsResponse, "financial_metrics")
 
     if not financial_metrics:
         return []
@@ -102,16 +289,11 @@ def get_financial_metrics(
     return financial_metrics
 
 
+@memoized
 def search_line_items( ticker: str, line_items: list[str], end_date: str,
                        period: str = "ttm",
                        limit: int = 10
 ) -> list[LineItem]:
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = "https://api.financialdatasets.ai/financials/search/line-items"
-
     body = {
         "tickers": [ticker],
         "line_items": line_items,
@@ -119,117 +301,246 @@ def search_line_items( ticker: str, line_items: list[str], end_date: str,
         "period": period,
         "limit": limit,
     }
-    response = requests.post(url, headers=headers, json=body)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-    data = response.json()
-    response_model = LineItemResponse(**data)
-    search_results = response_model.search_results
+    data = _request_json(ticker, "/financials/search/line-items", body, method="POST")
+    search_results = _parse_rows(data, LineItemResponse, "search_results")
     if not search_results:
         return []
 
-    # Cache the results
     return search_results[:limit]
 
 
-def get_insider_trades(
-    ticker: str,
-    end_date: str,
-    start_date: str | None = None,
-    limit: int = 1000,
-) -> list[InsiderTrade]:
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
+LINE_ITEM_BATCH_SIZE = int(os.getenv("QUANTAI_LINE_ITEM_BATCH_SIZE", "25"))
+# 单只股票同时在途的请求数（tools.pipeline 的取数线程数，批量财务科目请求的并发数）
+FETCH_CONCURRENCY = int(os.getenv("QUANTAI_FETCH_CONCURRENCY", "8"))
+
 
-    all_trades = []
+def search_line_items_batch(
+        tickers: list[str],
+        line_items: list[str],
+        end_date: str,
+        period: str = "ttm",
+        limit: int = 10,
+        batch_size: int = LINE_ITEM_BATCH_SIZE,
+) -> dict[str, list[LineItem]]:
+    """
+    search_line_items for many tickers: up to `batch_size` tickers go into one
+    POST, the search_results are split back out by ticker (at most `limit`
+    each, in the order returned) and every per-ticker result is seeded into
+    the request memo, so a later search_line_items(ticker, ...) with the same
+    arguments costs nothing.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    chunks = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    def fetch(chunk: list[str]) -> list[LineItem]:
+        body = {
+            "tickers": chunk,
+            "line_items": line_items,
+            "end_date": end_date,
+            "period": period,
+            # limit 是否按股票计算由服务端决定，这里按总数放宽，拆分后再逐只截断
+            "limit": limit * len(chunk),
+        }
+        data = _request_json(",".join(chunk), "/financials/search/line-items", body, method="POST")
+        return _parse_rows(data, LineItemResponse, "search_results")
+
+    results: dict[str, list[LineItem]] = {ticker: [] for ticker in tickers}
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(FETCH_CONCURRENCY, len(chunks)),
+                                thread_name_prefix="line-items") as executor:
+            for rows in executor.map(fetch, chunks):
+                for row in rows:
+                    ticker_rows = results.get(row.ticker)
+                    if ticker_rows is not None and len(ticker_rows) < limit:
+                        ticker_rows.append(row)
+
+    for ticker, rows in results.items():
+        search_line_items.seed(rows, ticker, line_items, end_date, period=period, limit=limit)
+    return results
+
+
+def prefetch_line_items(tickers: list[str], end_date: str, requirements: dict[str, LineItemRequirement]) -> None:
+    """Batch-fetch every agent's line items for a group of tickers ahead of their per-ticker pipeline runs."""
+    for plan in plan_line_item_requests(requirements):
+        search_line_items_batch(tickers, plan.line_items, end_date, period=plan.period, limit=plan.limit)
+
+
+def plan_line_item_requests(requirements: dict[str, LineItemRequirement]) -> list[LineItemRequirement]:
+    """
+    Merge per-agent requirements into one request per period: the union of all
+    line items and the largest limit. Smaller limits are served by slicing,
+    since results come back newest first.
+    """
+    plans: dict[str, LineItemRequirement] = {}
+    for requirement in requirements.values():
+        plan = plans.get(requirement.period)
+        if plan is None:
+            plan = LineItemRequirement(line_items=[], period=requirement.period, limit=requirement.limit)
+            plans[requirement.period] = plan
+        plan.limit = max(plan.limit, requirement.limit)
+        for item in requirement.line_items:
+            if item not in plan.line_items:
+                plan.line_items.append(item)
+    return list(plans.values())
+
+
+def slice_line_items(requirement: LineItemRequirement, dataset: FinancialDataset) -> FinancialDataset:
+    """Per-agent view of a merged dataset: first `limit` periods, only the requested fields. No copies."""
+    return dataset.head(requirement.limit).select(requirement.line_items)
+
+
+# 分页接口按时间切片并发抓取：每片的天数与同时在途的切片数
+PAGE_SLICE_DAYS = int(os.getenv("QUANTAI_PAGE_SLICE_DAYS", "90"))
+PAGE_CONCURRENCY = int(os.getenv("QUANTAI_PAGE_CONCURRENCY", "4"))
+
+
+def _date_slices(start_date: str, end_date: str, days: int) -> list[tuple[str, str]]:
+    """Split [start_date, end_date] into consecutive slices of at most `days` days, newest first."""
+    start = datetime.date.fromisoformat(start_date[:10])
+    end = datetime.date.fromisoformat(end_date[:10])
+    slices = []
+    while end >= start:
+        slice_start = max(start, end - datetime.timedelta(days=days - 1))
+        slices.append((slice_start.isoformat(), end.isoformat()))
+        end = slice_start - datetime.timedelta(days=1)
+    return slices
+
+
+def _fetch_pages(
+        ticker: str,
+        endpoint: str,
+        field: str,
+        date_field: str,
+        end_param: str,
+        start_param: str,
+        end_date: str,
+        start_date: str | None,
+        limit: int,
+        use_cache: bool = True,
+) -> list[dict]:
+    """
+    Raw rows of a date-paginated endpoint, newest first. Without a start_date
+    only the first page is fetched. With one, the range is cut into
+    PAGE_SLICE_DAYS slices fetched concurrently; a slice that fills a page
+    falls back to cursor paging within itself. Rows are deduplicated by their
+    natural key, which also drops the boundary rows cursor paging repeats.
+    """
+    fetch_slice = functools.partial(_fetch_slice, ticker, endpoint, field, date_field, end_param, start_param,
+                                    limit=limit, use_cache=use_cache)
+    if not start_date:
+        return fetch_slice(end_date, None)
+
+    slices = _date_slices(start_date, end_date, PAGE_SLICE_DAYS)
+    if len(slices) == 1:
+        pages = [fetch_slice(end_date, start_date)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(PAGE_CONCURRENCY, len(slices)),
+                                thread_name_prefix=f"pages-{ticker}") as executor:
+            pages = list(executor.map(lambda bounds: fetch_slice(bounds[1], bounds[0]), slices))
+
+    key = NATURAL_KEYS[field]
+    seen = set()
+    all_rows = []
+    for rows in pages:
+        for row in rows:
+            if key(row) not in seen:
+                seen.add(key(row))
+                all_rows.append(row)
+    return all_rows
+
+
+def _fetch_slice(
+        ticker: str,
+        endpoint: str,
+        field: str,
+        date_field: str,
+        end_param: str,
+        start_param: str,
+        end_date: str,
+        start_date: str | None,
+        limit: int,
+        use_cache: bool = True,
+) -> list[dict]:
+    """Cursor paging backwards from end_date: each next page ends at the oldest date of the previous one."""
+    all_rows = []
     current_end_date = end_date
 
     while True:
-        url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={current_end_date}"
+        params = {"ticker": ticker, end_param: current_end_date}
         if start_date:
-            url += f"&filing_date_gte={start_date}"
-        url += f"&limit={limit}"
-
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+            params[start_param] = start_date
+        params["limit"] = limit
 
-        data = response.json()
-        response_model = InsiderTradeResponse(**data)
-        insider_trades = response_model.insider_trades
+        rows = _request_json(ticker, endpoint, params, use_cache=use_cache).get(field) or []
 
-        if not insider_trades:
+        if not rows:
             break
 
-        all_trades.extend(insider_trades)
+        all_rows.extend(rows)
 
         # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(insider_trades) < limit:
+        if not start_date or len(rows) < limit:
             break
 
-        # Update end_date to the oldest filing date from current batch for next iteration
-        current_end_date = min(trade.filing_date for trade in insider_trades).split('T')[0]
+        # Update end_date to the oldest date from current batch for next iteration
+        next_end_date = min(row[date_field] for row in rows).split('T')[0]
+
+        # 接口只能按日期翻页：整页都落在同一天时这一天剩下的数据取不到，跳到前一天继续
+        if next_end_date == current_end_date:
+            next_end_date = (datetime.date.fromisoformat(next_end_date) - datetime.timedelta(days=1)).isoformat()
+        current_end_date = next_end_date
 
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
+        # If we've passed the start_date, we can stop. The start day itself is
+        # fetched once more, since the previous page may have cut it off.
+        if current_end_date < start_date:
             break
 
-    if not all_trades:
+    return all_rows
+
+
+def _fetch_synced(dataset: str, ticker: str, date_field: str, end_date: str, start_date: str | None, limit: int,
+                  fetch: Callable[..., list[dict]]) -> list[dict]:
+    """Rows from the incremental store when it is enabled, otherwise straight from the API."""
+    if not incremental_store.enabled or cassette.active:
+        return fetch(end_date, start_date)
+    # 本地存储自己负责持久化，增量请求不再写 JSON 磁盘缓存
+    return incremental_store.sync(dataset, ticker, date_field, end_date, start_date, limit,
+                                  functools.partial(fetch, use_cache=False))
+
+
+@memoized
+def get_insider_trades(
+    ticker: str,
+    end_date: str,
+    start_date: str | None = None,
+    limit: int = 1000,
+) -> list[InsiderTrade]:
+    def fetch(end: str, start: str | None, use_cache: bool = True) -> list[dict]:
+        return _fetch_pages(ticker, "/insider-trades/", "insider_trades", "filing_date",
+                            "filing_date_lte", "filing_date_gte", end, start, limit, use_cache)
+
+    rows = _fetch_synced("insider_trades", ticker, "filing_date", end_date, start_date, limit, fetch)
+    if not rows:
         return []
 
-    return all_trades
+    return _parse_rows({"insider_trades": rows}, InsiderTradeResponse, "insider_trades")
 
 
+@memoized
 def get_company_news(
         ticker: str,
         end_date: str,
         start_date: str | None = None,
         limit: int = 100,
 ) -> list[CompanyNews]:
+    def fetch(end: str, start: str | None, use_cache: bool = True) -> list[dict]:
+        return _fetch_pages(ticker, "/news/", "news", "date", "end_date", "start_date", end, start, limit, use_cache)
 
-
-    all_news = []
-    current_end_date = end_date
-
-    while True:
-        url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={current_end_date}"
-        if start_date:
-            url += f"&start_date={start_date}"
-        url += f"&limit={limit}"
-        headers = {}
-        if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-            headers["X-API-KEY"] = api_key
-
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-
-        data = response.json()
-        response_model = CompanyNewsResponse(**data)
-        company_news = response_model.news
-
-        if not company_news:
-            break
-
-        all_news.extend(company_news)
-
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(company_news) < limit:
-            break
-
-        # Update end_date to the oldest date from current batch for next iteration
-        current_end_date = min(news.date for news in company_news).split('T')[0]
-
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
-
-    if not all_news:
+    rows = _fetch_synced("news", ticker, "date", end_date, start_date, limit, fetch)
+    if not rows:
         return []
 
-    return all_news
-
+    return _parse_rows({"news": rows}, CompanyNewsResponse, "news")
 
 
 def get_market_cap(
@@ -255,7 +566,34 @@ def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     return df
 
 
-# Update the get_price_data function to use the new functions
+def price_frame_from_columns(columns: dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Typed price columns (float64 OHLC, int64 volume, the raw `time` strings) as a
+    DataFrame indexed by a sorted DatetimeIndex named Date. Same frame as
+    prices_to_df, without building Price objects, dumping them back to dicts and
+    re-parsing every column.
+    """
+    # 仓库列是 np.memmap，转成普通 ndarray 视图，调用方拿到的列类型与 prices_to_df 一致
+    frame = pd.DataFrame(
+        {name: np.asarray(columns[name]) for name in PRICE_COLUMNS},
+        index=pd.DatetimeIndex(pd.to_datetime(list(columns["time"]), format="ISO8601"), name="Date"),
+        copy=False,
+    )
+    if not frame.index.is_monotonic_increasing:
+        frame = frame.sort_index(kind="stable")
+    return frame
+
+
+def price_frame_from_json(data: dict) -> pd.DataFrame:
+    """Decode a /prices/ response straight into a DataFrame (see price_frame_from_columns)."""
+    return price_frame_from_columns(price_columns_from_rows(data.get("prices") or []))
+
+
+@memoized
+def get_price_frame(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """Daily prices as a DataFrame (see price_frame_from_columns). Shared within a run, so treat it as read-only."""
+    return price_frame_from_columns(get_price_columns(ticker, start_date, end_date))
+
+
 def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
+    return get_price_frame(ticker, start_date, end_date)
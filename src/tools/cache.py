@@ -0,0 +1,265 @@
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# 默认缓存目录与容量，可通过环境变量覆盖
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "quantai")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 各接口的缓存有效期（秒）。None 表示数据不会再变化，永久有效
+ENDPOINT_TTLS = {
+    "/prices/": 15 * 60,
+    "/financial-metrics/": 24 * 3600,
+    "/financials/search/line-items": 24 * 3600,
+    "/insider-trades/": 6 * 3600,
+    "/news/": 15 * 60,
+}
+
+
+try:
+    EXCHANGE_TZ = ZoneInfo("America/New_York")
+except ZoneInfoNotFoundError:
+    # 没有时区数据库（如 Windows 未装 tzdata）时固定按 UTC-5；夏令时期间只会更保守
+    EXCHANGE_TZ = datetime.timezone(datetime.timedelta(hours=-5))
+
+# 美股收盘时间（美东），以及收盘后日线数据发布的延迟
+MARKET_CLOSE = datetime.time(16, 0)
+PRICE_PUBLISH_LAG = datetime.timedelta(minutes=int(os.getenv("QUANTAI_PRICE_PUBLISH_LAG_MINUTES", "120")))
+
+
+def last_closed_day(now: Optional[datetime.datetime] = None) -> str:
+    """
+    The latest exchange (US/Eastern) calendar date whose daily bar is final:
+    today once the close plus PRICE_PUBLISH_LAG has passed, otherwise
+    yesterday. The local time zone of the machine plays no part.
+    """
+    shifted = (now or datetime.datetime.now(EXCHANGE_TZ)).astimezone(EXCHANGE_TZ) - PRICE_PUBLISH_LAG
+    day = shifted.date() if shifted.time() >= MARKET_CLOSE else shifted.date() - datetime.timedelta(days=1)
+    return day.isoformat()
+
+
+def endpoint_ttl(endpoint: str, params: dict) -> Optional[float]:
+    """
+    Pick the TTL for a request. Price windows that end on or before the last
+    closed exchange day never change, so they are cached forever.
+    """
+    if endpoint == "/prices/":
+        end_date = params.get("end_date")
+        if end_date and end_date <= last_closed_day():
+            return None
+    return ENDPOINT_TTLS.get(endpoint, 3600)
+
+
+def cache_key(endpoint: str, params: dict) -> str:
+    """Content address of a request: sha256 of the endpoint and its normalized parameters."""
+    normalized = json.dumps({"endpoint": endpoint, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed on-disk JSON cache with per-entry TTL and size-bounded LRU eviction.
+    File mtime is used as the last-access time, so recency survives process restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at < time.time():
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # 记录最近访问时间，用于 LRU
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry["data"]
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self._total_bytes is None:
+            self._total_bytes = self.size()
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        entry = {
+            "expires_at": time.time() + ttl if ttl is not None else None,
+            "data": data,
+        }
+        # 先写临时文件再原子替换，避免并发读到半个文件
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        with self._lock:
+            self._total_bytes += os.path.getsize(path) - old_size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def clear(self) -> None:
+        for path, _, _ in self._entries():
+            self._remove(path)
+        self._total_bytes = 0
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        # 重新扫描目录以校正其他进程写入造成的偏差，最久未访问的先淘汰
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+        with self._lock:
+            self._total_bytes = total
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class RequestMemo:
+    """
+    In-memory memo of fetcher results for the current run.
+    Identical calls share one result, and calls that arrive while the first is
+    still in flight wait for it instead of issuing a duplicate request.
+    Failures are not memoized. Entries live until invalidate() is called.
+    """
+
+    def __init__(self):
+        self._futures: dict[Hashable, tuple[Optional[str], Future]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def call(self, key: Hashable, ticker: Optional[str], fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._futures.get(key)
+            if entry is None:
+                future = Future()
+                self._futures[key] = (ticker, future)
+                self.misses += 1
+            else:
+                future = entry[1]
+                self.hits += 1
+        if entry is None:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                with self._lock:
+                    self._futures.pop(key, None)
+                future.set_exception(e)
+        return future.result()
+
+    def seed(self, key: Hashable, ticker: Optional[str], value: Any) -> None:
+        """Store a result obtained some other way (e.g. a batched request) unless the key is already present."""
+        with self._lock:
+            if key not in self._futures:
+                future = Future()
+                future.set_result(value)
+                self._futures[key] = (ticker, future)
+
+    def invalidate(self, ticker: Optional[str] = None) -> None:
+        """Drop every memoized result, or only those of one ticker."""
+        with self._lock:
+            if ticker is None:
+                self._futures.clear()
+            else:
+                self._futures = {k: v for k, v in self._futures.items() if v[0] != ticker}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._futures)}
+
+
+request_memo = RequestMemo()
+
+api_cache = DiskCache(
+    directory=os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "api"),
+    max_bytes=int(os.getenv("QUANTAI_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+    enabled=os.getenv("QUANTAI_CACHE_DISABLED", "").lower() not in ("1", "true", "yes"),
+)
+
+# 大模型回复缓存：按 (model, messages, temperature, max_tokens) 寻址，不设过期，只按容量淘汰
+llm_cache = DiskCache(
+    directory=os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "llm"),
+    max_bytes=int(os.getenv("QUANTAI_LLM_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    enabled=os.getenv("QUANTAI_CACHE_DISABLED", "").lower() not in ("1", "true", "yes"),
+)
@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Any
+
+from tools.cache import DEFAULT_CACHE_DIR
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a request the cassette never recorded."""
+
+
+class Cassette:
+    """
+    Record/replay of API traffic (financialdatasets and DeepSeek) in one
+    gzip-compressed JSON-lines file.
+
+    In record mode every request is sent for real, bypassing the read side of
+    the disk caches, and the request with its response is appended. Each entry
+    is written as its own gzip member through an O_APPEND file, so several
+    processes can record into the same cassette and a crash loses at most the
+    entry being written. In replay mode nothing touches the network: requests
+    are answered from the file by key, in recorded order when the same request
+    was made more than once (the last answer repeats after that), and a request
+    that was never recorded raises CassetteMiss.
+    """
+
+    def __init__(self, path: str, mode: str = "off"):
+        self._lock = threading.Lock()
+        self.use(mode, path)
+
+    def use(self, mode: str, path: str | None = None) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        with self._lock:
+            self.mode = mode
+            self.path = path or self.path
+            self._entries: dict[str, list[dict]] | None = None
+            self._played: defaultdict[str, int] = defaultdict(int)
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> dict[str, list[dict]]:
+        entries = defaultdict(list)
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry["key"]].append(entry)
+        except FileNotFoundError:
+            raise CassetteMiss(f"Cassette {self.path} does not exist") from None
+        except (EOFError, gzip.BadGzipFile):
+            pass  # 录制中断留下的半截条目，之前的都可用
+        return entries
+
+    def record(self, kind: str, key: str, request: dict, response: Any, status: int = 200) -> None:
+        if not self.recording:
+            return
+        line = json.dumps({"kind": kind, "key": key, "request": request, "status": status, "response": response},
+                          ensure_ascii=False) + "\n"
+        data = gzip.compress(line.encode("utf-8"), compresslevel=6)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def replay(self, kind: str, key: str) -> tuple[int, Any]:
+        """(status, response) recorded for `key`."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded {kind} response for request {key} in {self.path}")
+            index = min(self._played[key], len(entries) - 1)
+            self._played[key] += 1
+        entry = entries[index]
+        return entry["status"], entry["response"]
+
+
+cassette = Cassette(
+    path=os.getenv("QUANTAI_CASSETTE") or os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR),
+                                                       "cassette.jsonl.gz"),
+    mode=os.getenv("QUANTAI_CASSETTE_MODE", "off").lower(),
+)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from utils.ProgressBar import progress, ProgressStatus, TaskName
+
+AGENT_CONCURRENCY = int(os.getenv("QUANTAI_AGENT_CONCURRENCY", "8"))
+AGENT_TIMEOUT = float(os.getenv("QUANTAI_AGENT_TIMEOUT", "180"))
+
+# 主线程检查超时的轮询间隔（秒）
+_POLL_INTERVAL = 0.5
+
+
+def run_agents(
+        tasks: dict[str, tuple[TaskName, Callable[[], Any]]],
+        max_workers: int = AGENT_CONCURRENCY,
+        timeout: float = AGENT_TIMEOUT,
+        dependencies: dict[str, list[Future]] | None = None,
+        on_result: Callable[[str, Any, Exception | None], None] | None = None,
+) -> tuple[dict[str, Any], dict[str, Exception]]:
+    """
+    Run agents on a bounded thread pool.
+
+    `tasks` maps a result key to (progress task, zero-argument callable). A task
+    listed in `dependencies` is only submitted once all of its futures are done
+    (if one of them failed, the task fails with that error without running), so
+    agents start as soon as their own inputs are ready. Each call gets `timeout`
+    seconds from the moment it starts; a call that fails or times out is
+    reported through the progress bar and returned in the error dict instead of
+    aborting the others. Results keep the order of `tasks`.
+
+    `on_result(name, result, error)` is called from this thread the moment each
+    task finishes, fails or times out, for callers that stream results.
+    """
+    started: dict[str, float] = {}
+    started_lock = threading.Lock()
+
+    def run(name: str, task_name: TaskName, func: Callable[[], Any]) -> Any:
+        with started_lock:
+            started[name] = time.monotonic()
+        progress.update(task_name, ProgressStatus.WORKING, task_name.chinese + "分析 开始")
+        return func()
+
+    results: dict[str, Any] = {}
+    errors: dict[str, Exception] = {}
+    blocked = {name: list(futures) for name, futures in (dependencies or {}).items() if futures and name in tasks}
+    futures: dict[Future, str] = {}
+    pending: set[Future] = set()
+
+    def finish(name: str, result: Any = None, error: Exception | None = None) -> None:
+        if error is None:
+            results[name] = result
+        else:
+            errors[name] = error
+        if on_result is not None:
+            on_result(name, result, error)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
+
+    def submit(name: str) -> None:
+        future = executor.submit(run, name, *tasks[name])
+        futures[future] = name
+        pending.add(future)
+
+    for name in tasks:
+        if name not in blocked:
+            submit(name)
+    try:
+        while pending or blocked:
+            for name, inputs in list(blocked.items()):
+                if not all(future.done() for future in inputs):
+                    continue
+                del blocked[name]
+                failed = next((e for future in inputs if (e := future.exception()) is not None), None)
+                if failed is None:
+                    submit(name)
+                else:
+                    finish(name, error=failed)
+                    task_name = tasks[name][0]
+                    progress.update(task_name, ProgressStatus.ERROR, f"{task_name.chinese}分析 输入数据获取失败: {failed}")
+
+            # 同时等待在途的策略和尚未就绪的输入，任一完成即可继续调度
+            waiting_inputs = {future for inputs in blocked.values() for future in inputs if not future.done()}
+            if not pending and not waiting_inputs:
+                continue
+            wait(pending | waiting_inputs, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            done = {future for future in pending if future.done()}
+            pending -= done
+            for future in done:
+                name = futures[future]
+                task_name = tasks[name][0]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    finish(name, error=e)
+                    progress.update(task_name, ProgressStatus.ERROR, f"{task_name.chinese}分析 失败: {e}")
+                else:
+                    finish(name, result)
+                    progress.update(task_name, ProgressStatus.DONE, task_name.chinese + "分析 结束")
+
+            now = time.monotonic()
+            with started_lock:
+                timed_out = [f for f in pending if futures[f] in started and now - started[futures[f]] > timeout]
+            for future in timed_out:
+                # 线程无法被强制终止，这里只是放弃等待它的结果
+                pending.discard(future)
+                name = futures[future]
+                task_name = tasks[name][0]
+                finish(name, error=TimeoutError(f"{name} timed out after {timeout:.0f}s"))
+                progress.update(task_name, ProgressStatus.ERROR, f"{task_name.chinese}分析 超时")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {name: results[name] for name in tasks if name in results}, errors
@@ -0,0 +1,130 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tools.rate_limit import RateLimiter, api_rate_limiter, retry_after_seconds
+
+DEFAULT_BASE_URL = "https://api.financialdatasets.ai"
+
+# 需要退避重试的状态码：429 限流与暂时性的服务端错误
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class FinancialDatasetsClient:
+    """
+    Pooled HTTP client for the financialdatasets API.
+    One requests.Session keeps TLS connections alive between calls and the API
+    key header is set once. Every request goes through the shared RateLimiter;
+    429/5xx responses shrink its concurrency, pause all callers for the
+    Retry-After interval (or exponential backoff) and are retried here, while
+    urllib3 only retries connection errors.
+    """
+
+    def __init__(
+            self,
+            base_url: str | None = None,
+            api_key: str | None = None,
+            pool_size: int = 16,
+            max_retries: int = 3,
+            backoff_factor: float = 0.5,
+            timeout: float = 30.0,
+            limiter: RateLimiter | None = None,
+    ):
+        self.base_url = (base_url or os.getenv("FINANCIAL_DATASETS_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.limiter = limiter or api_rate_limiter
+
+        # 状态码重试交给 request()，否则 urllib3 会绕过限流器自行重试 429
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status=0,
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.session.headers["Connection"] = "keep-alive"
+        if api_key := api_key or os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+            self.session.headers["X-API-KEY"] = api_key
+
+    def _send(self, method: str, url: str, params: dict | None) -> requests.Response:
+        if method == "POST":
+            return self.session.post(url, json=params, timeout=self.timeout)
+        return self.session.get(url, params=params, timeout=self.timeout)
+
+    def request(self, method: str, endpoint: str, params: dict | None = None) -> requests.Response:
+        url = self.base_url + endpoint
+        for attempt in range(self.max_retries + 1):
+            with self.limiter.slot():
+                response = self._send(method, url, params)
+            if response.status_code not in RETRY_STATUSES:
+                self.limiter.on_success()
+                return response
+
+            pause = retry_after_seconds(response.headers.get("Retry-After"))
+            if pause is None:
+                pause = self.backoff_factor * 2 ** attempt
+            # 暂停由限流器统一执行：下一次 slot() 会等到暂停结束，其他线程和进程也一样
+            self.limiter.on_throttle(pause)
+        return response
+
+    def rate_limit_stats(self) -> dict:
+        return self.limiter.stats()
+
+    def connection_stats(self) -> dict:
+        """Requests sent vs. new TCP/TLS connections opened, summed over all live pools."""
+        managers = [self._adapter.poolmanager, *self._adapter.proxy_manager.values()]
+        num_requests = 0
+        num_connections = 0
+        for manager in managers:
+            for key in list(manager.pools.keys()):
+                try:
+                    pool = manager.pools[key]
+                except KeyError:
+                    continue
+                num_requests += pool.num_requests
+                num_connections += pool.num_connections
+        return {
+            "requests": num_requests,
+            "new_connections": num_connections,
+            "reused_connections": max(num_requests - num_connections, 0),
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: FinancialDatasetsClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> FinancialDatasetsClient:
+    """
+    Process-wide client, created on first use so that variables loaded by
+    load_dotenv() (API key, base URL) are already in the environment.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = FinancialDatasetsClient()
+    return _client
+
+
+def set_client(client: FinancialDatasetsClient | None) -> None:
+    """Replace the shared client, e.g. to point it at a local stand-in server. None resets it."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
@@ -0,0 +1,97 @@
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Callable, Hashable
+
+from tools.cache import DEFAULT_CACHE_DIR
+
+# 未命中时的返回值；None 本身可能是合法的结果（如 market_cap）
+MISSING = object()
+
+
+def _safe_name(key: Hashable) -> str:
+    parts = key if isinstance(key, tuple) else (key,)
+    return "-".join(str(part) for part in parts).replace(os.sep, "_")
+
+
+class RunJournal:
+    """
+    Checkpoints of a run per (ticker, end_date): every fetched dataset the
+    agents consumed and every agent output that completed. A re-run with the
+    journal enabled loads what is there and only fetches or recomputes the
+    rest, so a run that dies halfway costs a retry of the missing pieces.
+
+    Each entry carries a fingerprint (request parameters for data, code and
+    input fingerprints for agents) and is ignored once the fingerprint changes
+    or the entry is older than `max_age` seconds. Failed agents are never
+    recorded. Data is pickled, agent outputs are JSON.
+    """
+
+    def __init__(self, directory: str, enabled: bool = False, max_age: float = 24 * 3600):
+        self.directory = directory
+        self.enabled = enabled
+        self.max_age = max_age
+        self.resumed = 0
+        self.recorded = 0
+
+    def _dir(self, ticker: str, end_date: str) -> str:
+        return os.path.join(self.directory, ticker.upper(), end_date)
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _valid(self, entry: dict, fingerprint: str) -> bool:
+        return entry.get("fingerprint") == fingerprint and time.time() - entry.get("created", 0) <= self.max_age
+
+    def has_entries(self, ticker: str, end_date: str) -> bool:
+        """Whether an earlier run already checkpointed anything for this ticker."""
+        return os.path.isdir(self._dir(ticker, end_date))
+
+    def load_agent(self, ticker: str, end_date: str, agent: str, fingerprint: str) -> Any:
+        """Recorded output of `agent`, or MISSING."""
+        try:
+            with open(os.path.join(self._dir(ticker, end_date), "agents", agent + ".json"), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return MISSING
+        if not self._valid(entry, fingerprint):
+            return MISSING
+        self.resumed += 1
+        return entry["result"]
+
+    def save_agent(self, ticker: str, end_date: str, agent: str, fingerprint: str, result: Any) -> None:
+        entry = {"fingerprint": fingerprint, "created": time.time(), "result": result}
+        path = os.path.join(self._dir(ticker, end_date), "agents", agent + ".json")
+        self._write(path, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        self.recorded += 1
+
+    def fetch(self, ticker: str, end_date: str, key: Hashable, fingerprint: str, fetch: Callable[[], Any]) -> Any:
+        """Dataset `key` from the journal, or `fetch()` recorded for the next run."""
+        path = os.path.join(self._dir(ticker, end_date), "data", _safe_name(key) + ".pkl")
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            if self._valid(entry, fingerprint):
+                return entry["value"]
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass
+        value = fetch()
+        entry = {"fingerprint": fingerprint, "created": time.time(), "value": value}
+        self._write(path, pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def stats(self) -> dict:
+        return {"resumed": self.resumed, "recorded": self.recorded}
+
+
+run_journal = RunJournal(
+    directory=os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "journal"),
+    enabled=os.getenv("QUANTAI_RUN_JOURNAL", "").lower() in ("1", "true", "yes"),
+    max_age=float(os.getenv("QUANTAI_JOURNAL_MAX_AGE_HOURS", "24")) * 3600,
+)
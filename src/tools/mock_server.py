@@ -0,0 +1,369 @@
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from data.models import FinancialMetrics
+
+# 合成价格序列的起点，任何查询区间都从同一条随机游走上截取，保证多次查询结果一致
+_PRICE_EPOCH = datetime.date(2000, 1, 3)
+_PRICE_DAYS = 40 * 262
+_META_FIELDS = {"ticker", "report_period", "period", "currency"}
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic generator for one (ticker, dataset, ...) combination."""
+    return random.Random(hashlib.sha256(":".join(map(str, parts)).encode("utf-8")).hexdigest())
+
+
+class SyntheticData:
+    """
+    Deterministic fake payloads for the financialdatasets endpoints. The same
+    query always returns the same rows, and overlapping date ranges agree with
+    each other, so caches, the price warehouse and incremental sync behave as
+    they would against the real API.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._paths: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _price_path(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if ticker not in self._paths:
+                rnd = np.random.default_rng(_rng(self.seed, ticker, "prices").getrandbits(64))
+                days = np.busday_offset(np.datetime64(_PRICE_EPOCH), np.arange(_PRICE_DAYS), roll="forward")
+                close = rnd.uniform(20, 500) * np.exp(np.cumsum(rnd.normal(0.0003, 0.02, _PRICE_DAYS)))
+                self._paths[ticker] = (days.astype("datetime64[D]"), close)
+            return self._paths[ticker]
+
+    def prices(self, ticker: str, start_date: str, end_date: str) -> dict:
+        days, close = self._price_path(ticker)
+        lo, hi = np.searchsorted(days, np.datetime64(start_date)), np.searchsorted(days, np.datetime64(end_date), "right")
+        rows = []
+        for i in range(lo, hi):
+            rnd = _rng(self.seed, ticker, "bar", i)
+            prev = close[i - 1] if i else close[i]
+            rows.append({
+                "open": round(float(prev) * (1 + rnd.gauss(0, 0.005)), 2),
+                "close": round(float(close[i]), 2),
+                "high": round(float(max(prev, close[i])) * (1 + abs(rnd.gauss(0, 0.008))), 2),
+                "low": round(float(min(prev, close[i])) * (1 - abs(rnd.gauss(0, 0.008))), 2),
+                "volume": rnd.randint(500_000, 50_000_000),
+                "time": f"{days[i]}T05:00:00Z",
+            })
+        return {"ticker": ticker, "prices": rows}
+
+    @staticmethod
+    def _report_periods(end_date: str, period: str, limit: int) -> list[str]:
+        end = datetime.date.fromisoformat(end_date[:10])
+        step = 12 if period == "annual" else 3
+        # 最近一个已结束的季末
+        month = ((end.month - 1) // 3) * 3
+        year = end.year if month else end.year - 1
+        month = month or 12
+        periods = []
+        for _ in range(limit):
+            last_day = (datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1))
+            periods.append(last_day.isoformat())
+            month -= step
+            while month <= 0:
+                month += 12
+                year -= 1
+        return periods
+
+    def financial_metrics(self, ticker: str, end_date: str, period: str, limit: int) -> dict:
+        rows = []
+        for report_period in self._report_periods(end_date, period, limit):
+            rnd = _rng(self.seed, ticker, "metrics", period, report_period)
+            row = {"ticker": ticker, "report_period": report_period, "period": period, "currency": "USD"}
+            for name in FinancialMetrics.model_fields:
+                if name not in _META_FIELDS:
+                    row[name] = self._metric_value(name, rnd)
+            rows.append(row)
+        return {"financial_metrics": rows}
+
+    @staticmethod
+    def _metric_value(name: str, rnd: random.Random) -> float:
+        if name in ("market_cap", "enterprise_value"):
+            return round(rnd.uniform(5e9, 3e12), 0)
+        if "growth" in name:
+            return round(rnd.uniform(-0.2, 0.6), 4)
+        if "margin" in name or name.startswith("return_on") or name in ("free_cash_flow_yield", "payout_ratio",
+                                                                         "debt_to_assets"):
+            return round(rnd.uniform(0.02, 0.6), 4)
+        if "per_share" in name:
+            return round(rnd.uniform(0.5, 40), 2)
+        return round(rnd.uniform(0.3, 40), 3)
+
+    def line_items(self, tickers: list[str], line_items: list[str], end_date: str, period: str, limit: int) -> dict:
+        rows = []
+        for ticker in tickers:
+            scale = _rng(self.seed, ticker, "scale").uniform(1e9, 2e11)
+            for report_period in self._report_periods(end_date, period, limit):
+                rnd = _rng(self.seed, ticker, "line_items", period, report_period)
+                row = {"ticker": ticker, "report_period": report_period, "period": period, "currency": "USD"}
+                for name in line_items:
+                    row[name] = self._line_item_value(name, scale, rnd)
+                rows.append(row)
+        return {"search_results": rows}
+
+    @staticmethod
+    def _line_item_value(name: str, scale: float, rnd: random.Random) -> float:
+        if "margin" in name or name.startswith("return_on") or "ratio" in name:
+            return round(rnd.uniform(0.02, 0.6), 4)
+        if "shares" in name:
+            return float(rnd.randint(100_000_000, 20_000_000_000))
+        if "per_share" in name:
+            return round(rnd.uniform(0.1, 10), 2)
+        value = scale * rnd.uniform(0.02, 1.2)
+        # 资本开支、分红、折旧等在报表中通常为负数
+        if name in ("capital_expenditure", "dividends_and_other_cash_distributions",
+                    "issuance_or_purchase_of_equity_shares"):
+            value = -value
+        return round(value, 0)
+
+    def _daily_events(self, ticker: str, kind: str, end_date: str, start_date: str | None, limit: int,
+                      per_day: int, build) -> list[dict]:
+        """Events generated per calendar day, newest first, walking back until `limit` or start_date."""
+        day = datetime.date.fromisoformat(end_date[:10])
+        start = datetime.date.fromisoformat(start_date[:10]) if start_date else _PRICE_EPOCH
+        rows = []
+        while day >= start and len(rows) < limit:
+            rnd = _rng(self.seed, ticker, kind, day)
+            for index in range(rnd.randint(0, per_day)):
+                rows.append(build(rnd, day, index))
+            day -= datetime.timedelta(days=1)
+        rows.sort(key=lambda row: row["date" if kind == "news" else "filing_date"], reverse=True)
+        return rows[:limit]
+
+    def insider_trades(self, ticker: str, end_date: str, start_date: str | None, limit: int) -> dict:
+        def build(rnd: random.Random, day: datetime.date, index: int) -> dict:
+            shares = rnd.choice([-1, 1]) * float(rnd.randint(100, 200_000))
+            price = round(rnd.uniform(20, 500), 2)
+            return {
+                "ticker": ticker,
+                "issuer": f"{ticker} Inc.",
+                "name": f"Insider {rnd.randint(1, 12)}",
+                "title": rnd.choice(["CEO", "CFO", "Director", "EVP", None]),
+                "is_board_director": rnd.random() < 0.3,
+                "transaction_date": (day - datetime.timedelta(days=2)).isoformat(),
+                "transaction_shares": shares,
+                "transaction_price_per_share": price,
+                "transaction_value": round(shares * price, 2),
+                "shares_owned_before_transaction": float(rnd.randint(200_000, 5_000_000)),
+                "shares_owned_after_transaction": float(rnd.randint(200_000, 5_000_000)),
+                "security_title": "Common Stock",
+                "filing_date": day.isoformat(),
+            }
+
+        return {"insider_trades": self._daily_events(ticker, "insider", end_date, start_date, limit, 1, build)}
+
+    def news(self, ticker: str, end_date: str, start_date: str | None, limit: int) -> dict:
+        def build(rnd: random.Random, day: datetime.date, index: int) -> dict:
+            return {
+                "ticker": ticker,
+                "title": f"{ticker} headline {day} #{index}",
+                "author": f"Reporter {rnd.randint(1, 50)}",
+                "source": rnd.choice(["Reuters", "Bloomberg", "CNBC", "WSJ"]),
+                "date": f"{day}T{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:00Z",
+                "url": f"https://news.example.com/{ticker}/{day}/{index}",
+                "sentiment": rnd.choice(["positive", "negative", "neutral"]),
+            }
+
+        return {"news": self._daily_events(ticker, "news", end_date, start_date, limit, 3, build)}
+
+    def chat_completion(self, body: dict) -> dict:
+        messages = body.get("messages") or []
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+        rnd = _rng(self.seed, "llm", digest)
+        answer = {
+            "signal": rnd.choice(["看涨", "看跌", "中立"]),
+            "confidence": round(rnd.uniform(30, 95), 1),
+            "reasoning": "模拟服务器生成的分析结论",
+        }
+        content = "```json\n" + json.dumps(answer, ensure_ascii=False) + "\n```"
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        return {
+            "id": "chatcmpl-" + digest[:24],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "deepseek-chat"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4},
+        }
+
+
+class MockAPIServer:
+    """
+    Local stand-in for the financialdatasets and DeepSeek APIs, for offline
+    load tests. Point FINANCIAL_DATASETS_BASE_URL and DEEPSEEK_BASE_URL at
+    `url`. Each request waits `latency_ms` plus an exponential tail with mean
+    `jitter_ms` (LLM calls use `llm_latency_ms`), fails with a 500 at
+    `error_rate`, and gets a 429 with Retry-After above `rate_limit` req/s.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 llm_latency_ms: float = 0.0, error_rate: float = 0.0, rate_limit: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.llm_latency_ms = llm_latency_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.data = SyntheticData(seed)
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._tokens = max(rate_limit, 1.0)
+        self._updated = time.monotonic()
+        self._random = random.Random(seed)
+        self._thread: threading.Thread | None = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self, "GET")
+
+            def do_POST(self):
+                server._handle(self, "POST")
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _take_token(self) -> float:
+        """0 if the request may proceed, else the Retry-After in seconds."""
+        if self.rate_limit <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate_limit
+
+    def _route(self, method: str, path: str, params: dict, body: dict) -> tuple[int, dict]:
+        limit = int(params.get("limit", body.get("limit", 10)))
+        if path == "/prices/":
+            return 200, self.data.prices(params["ticker"], params["start_date"], params["end_date"])
+        if path == "/financial-metrics/":
+            return 200, self.data.financial_metrics(params["ticker"], params["report_period_lte"],
+                                                    params.get("period", "ttm"), limit)
+        if path == "/financials/search/line-items" and method == "POST":
+            return 200, self.data.line_items(body["tickers"], body["line_items"], body["end_date"],
+                                             body.get("period", "ttm"), limit)
+        if path == "/insider-trades/":
+            return 200, self.data.insider_trades(params["ticker"], params["filing_date_lte"],
+                                                 params.get("filing_date_gte"), limit)
+        if path == "/news/":
+            return 200, self.data.news(params["ticker"], params["end_date"], params.get("start_date"), limit)
+        if path in ("/chat/completions", "/v1/chat/completions") and method == "POST":
+            return 200, self.data.chat_completion(body)
+        return 404, {"error": f"Unknown endpoint {method} {path}"}
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        parsed = urlparse(handler.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length) or b"{}") if length else {}
+        is_llm = parsed.path.endswith("/chat/completions")
+
+        headers = {}
+        retry_after = self._take_token()
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            delay = (self.llm_latency_ms if is_llm else self.latency_ms) + (
+                self._random.expovariate(1 / self.jitter_ms) if self.jitter_ms > 0 else 0.0)
+
+        if retry_after:
+            status, payload = 429, {"error": "Too Many Requests"}
+            headers["Retry-After"] = str(math.ceil(retry_after))
+        else:
+            time.sleep(delay / 1000)
+            if failed:
+                status, payload = 500, {"error": "Injected failure"}
+            else:
+                try:
+                    status, payload = self._route(method, parsed.path, params, body)
+                except (KeyError, ValueError) as e:
+                    status, payload = 400, {"error": f"Bad request: {e}"}
+
+        with self._lock:
+            self.requests[parsed.path] += 1
+            self.statuses[status] += 1
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self) -> "MockAPIServer":
+        """Serve from a daemon thread (for use inside benchmarks)."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": dict(self.requests), "statuses": dict(self.statuses)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="financialdatasets / DeepSeek 本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="数据接口的基础延迟")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="额外延迟（指数分布）的均值，用来模拟长尾")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500.0, help="chat completions 的基础延迟")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="每秒请求数上限，超出返回 429；0 表示不限")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = MockAPIServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.llm_latency_ms,
+                           args.error_rate, args.rate_limit, args.seed)
+    print(f"Mock API listening on {server.url}")
+    print(f"  export FINANCIAL_DATASETS_BASE_URL={server.url}")
+    print(f"  export DEEPSEEK_BASE_URL={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
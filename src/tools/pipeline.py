@@ -0,0 +1,352 @@
+import functools
+import importlib
+import inspect
+import multiprocessing
+import os
+import pkgutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Iterable
+
+from data.models import AgentInput, AgentSpec, FinancialDataset, LineItemRequirement, Price, construct_rows
+from strategy.technicals_panel import prices_to_panel, technical_analyst_panel
+from tools.api import (FETCH_CONCURRENCY, call_deepseek, get_company_news, get_financial_metrics, get_insider_trades,
+                       get_market_cap, get_price_columns, get_price_frame, get_prices, plan_line_item_requests,
+                       price_frame_from_columns, search_line_items, slice_line_items)
+from tools.cache import api_cache, cache_key, request_memo
+from tools.executor import AGENT_TIMEOUT, run_agents
+from tools.journal import MISSING, run_journal
+from tools.rate_limit import api_rate_limiter
+from tools.shared_columns import SharedColumns
+from tools.warehouse import price_rows_from_columns
+from utils.ProgressBar import progress, ProgressStatus, TaskName
+from utils.constants import TEMPLATE
+
+# 未声明 limit 时 financial-metrics 取的期数
+DEFAULT_METRICS_LIMIT = 10
+# 进程池模式下计算型分析使用的进程数，0 表示全部在线程中执行
+PROCESS_WORKERS = int(os.getenv("QUANTAI_PROCESS_WORKERS", "0"))
+# 进程池模式下 prices 与 price_frame 共用同一份共享内存中的价格列
+_PRICE_DATASETS = ("prices", "price_frame")
+
+_agents: dict[str, AgentSpec] | None = None
+_agents_lock = threading.Lock()
+
+
+def load_agents(package: str = "strategy") -> dict[str, AgentSpec]:
+    """
+    Every agent declared in `package`, by name: each module that exports an
+    AGENT spec is picked up, so a new strategy only needs its own module.
+    """
+    global _agents
+    if _agents is None:
+        with _agents_lock:
+            if _agents is None:
+                found = {}
+                for module_info in pkgutil.iter_modules(importlib.import_module(package).__path__):
+                    spec = getattr(importlib.import_module(f"{package}.{module_info.name}"), "AGENT", None)
+                    if isinstance(spec, AgentSpec):
+                        found[spec.name] = spec
+                _agents = dict(sorted(found.items()))
+    return _agents
+
+
+def select_agents(names: Iterable[str] | None = None) -> dict[str, AgentSpec]:
+    agents = load_agents()
+    if names is None:
+        return agents
+    names = set(names)
+    unknown = sorted(names - agents.keys())
+    if unknown:
+        raise ValueError(f"Unknown agents: {', '.join(unknown)}. Available: {', '.join(agents)}")
+    return {name: spec for name, spec in agents.items() if name in names}
+
+
+def line_item_requirements(agents: dict[str, AgentSpec]) -> dict[str, LineItemRequirement]:
+    """Line-item inputs of the agents, keyed "<agent>.<argument index>"."""
+    return {
+        f"{name}.{index}": agent_input.line_items
+        for name, spec in agents.items()
+        for index, agent_input in enumerate(spec.inputs)
+        if agent_input.dataset == "line_items"
+    }
+
+
+def _dataset_key(agent_input: AgentInput, shared: bool = False) -> Hashable:
+    """Fetch that serves the input; inputs sharing a key share one request."""
+    if shared and agent_input.dataset in _PRICE_DATASETS:
+        return "price_columns"
+    if agent_input.dataset in ("metrics", "line_items"):
+        period = agent_input.line_items.period if agent_input.line_items else agent_input.period
+        return agent_input.dataset, period
+    return agent_input.dataset
+
+
+def _line_item_dataset(ticker: str, line_items: list[str], end_date: str, period: str, limit: int) -> FinancialDataset:
+    # 每个 period 的行只转换一次为列式数据，各策略拿到的是共享数组上的视图
+    return FinancialDataset.from_line_items(search_line_items(ticker, line_items, end_date, period=period, limit=limit))
+
+
+def _ticker(ticker: str) -> str:
+    return ticker
+
+
+def plan_fetches(
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        agents: dict[str, AgentSpec],
+        shared: bool = False,
+) -> dict[Hashable, functools.partial]:
+    """
+    The minimal set of fetches for the agents: one per dataset (and period),
+    sized for the most demanding input; smaller inputs are slices of it. With
+    `shared`, prices and price_frame are served by one "price_columns" fetch
+    that run_pipeline moves into shared memory for worker processes.
+    """
+    fetches: dict[Hashable, functools.partial] = {}
+    metrics_limits: dict[str, int] = {}
+    for spec in agents.values():
+        for agent_input in spec.inputs:
+            if agent_input.dataset == "metrics":
+                limit = agent_input.limit or DEFAULT_METRICS_LIMIT
+                metrics_limits[agent_input.period] = max(metrics_limits.get(agent_input.period, 0), limit)
+
+    for period, limit in metrics_limits.items():
+        fetches["metrics", period] = functools.partial(get_financial_metrics, ticker, end_date,
+                                                       period=period, limit=limit)
+    for plan in plan_line_item_requests(line_item_requirements(agents)):
+        fetches["line_items", plan.period] = functools.partial(_line_item_dataset, ticker, plan.line_items, end_date,
+                                                               plan.period, plan.limit)
+
+    datasets = {_dataset_key(agent_input, shared) for spec in agents.values() for agent_input in spec.inputs}
+    simple = {
+        "price_columns": functools.partial(get_price_columns, ticker, start_date, end_date),
+        "insider_trades": functools.partial(get_insider_trades, ticker, end_date, limit=1000),
+        "company_news": functools.partial(get_company_news, ticker, end_date),
+        "market_cap": functools.partial(get_market_cap, ticker, end_date),
+        "prices": functools.partial(get_prices, ticker, start_date, end_date),
+        "price_frame": functools.partial(get_price_frame, ticker, start_date, end_date),
+        "ticker": functools.partial(_ticker, ticker),
+    }
+    fetches.update({dataset: fetch for dataset, fetch in simple.items() if dataset in datasets})
+    return fetches
+
+
+def _fetch_fingerprint(fetch: functools.partial) -> str:
+    return cache_key(fetch.func.__name__, {"args": fetch.args, "kwargs": fetch.keywords})
+
+
+_code_fingerprints: dict[str, str] = {}
+
+
+def _agent_fingerprint(spec: AgentSpec, input_fingerprints: list[str]) -> str:
+    """Changes whenever the agent's module (or, for LLM agents, the prompt template) or any of its inputs change."""
+    if spec.name not in _code_fingerprints:
+        with open(inspect.getsourcefile(spec.run), "rb") as f:
+            source = f.read().decode("utf-8")
+        _code_fingerprints[spec.name] = cache_key(spec.name, {"source": source, "template": TEMPLATE if spec.llm else ""})
+    return cache_key(spec.name, {"code": _code_fingerprints[spec.name], "inputs": input_fingerprints})
+
+
+def _resolve(agent_input: AgentInput, value: Any) -> Any:
+    if isinstance(value, SharedColumns):
+        # 共享内存中的价格列留给工作进程还原
+        return value
+    if agent_input.dataset == "line_items":
+        return slice_line_items(agent_input.line_items, value)
+    if agent_input.limit is not None and isinstance(value, list):
+        return value[:agent_input.limit]
+    return value
+
+
+def _run_in_worker(name: str, args: list) -> Any:
+    """Worker-process side of an agent: rebuild shared price inputs and run the deterministic part."""
+    spec = load_agents()[name]
+    resolved = []
+    for agent_input, arg in zip(spec.inputs, args):
+        if isinstance(arg, SharedColumns):
+            columns = arg.read()
+            if agent_input.dataset == "price_frame":
+                arg = price_frame_from_columns(columns)
+            else:
+                arg = construct_rows(Price, price_rows_from_columns(columns), 0.0)
+        resolved.append(arg)
+    return spec.run(*resolved)
+
+
+def create_process_pool(workers: int = PROCESS_WORKERS) -> ProcessPoolExecutor:
+    """
+    Worker processes for the CPU-bound part of every agent. spawn rather than
+    fork, since the parent already runs fetch, agent and progress threads.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=load_agents)
+
+
+def _agent_task(ticker: str, spec: AgentSpec, inputs: list[Future],
+                pool: ProcessPoolExecutor | None = None) -> Callable[[], Any]:
+    def run():
+        args = [_resolve(agent_input, future.result()) for agent_input, future in zip(spec.inputs, inputs)]
+        # 计算部分交给工作进程，当前线程只等待结果；LLM 请求仍在本进程的线程中发出
+        output = pool.submit(_run_in_worker, spec.name, args).result() if pool is not None else spec.run(*args)
+        if not spec.llm:
+            return output
+        analysis_data, intro_text, prompt = output
+        message = TEMPLATE.format(intro=intro_text, ticker=ticker, analysis_data=analysis_data)
+        return call_deepseek(prompt, message, timeout=AGENT_TIMEOUT)
+
+    return run
+
+
+def run_technical_panel(tickers: list[str], start_date: str, end_date: str,
+                        max_workers: int = FETCH_CONCURRENCY) -> dict[str, Any]:
+    """
+    technical_analyst for a whole batch of tickers in one vectorized pass
+    (strategy.technicals_panel), keyed by ticker, to hand to run_pipeline as
+    `precomputed`. Tickers whose prices fail to load or come back empty are
+    left out and analyzed per ticker as usual.
+    """
+    def fetch(ticker: str) -> list[Price]:
+        try:
+            return get_prices(ticker, start_date, end_date)
+        except Exception:
+            # 单只股票失败不影响整批，run_pipeline 中会重新获取并报告错误
+            return []
+
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers)),
+                            thread_name_prefix="technical-panel") as executor:
+        prices = {ticker: rows for ticker, rows in zip(tickers, executor.map(fetch, tickers)) if rows}
+    if not prices:
+        return {}
+    return technical_analyst_panel(*prices_to_panel(prices))
+
+
+def run_pipeline(
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        agents: dict[str, AgentSpec] | None = None,
+        max_workers: int = FETCH_CONCURRENCY,
+        pool: ProcessPoolExecutor | None = None,
+        on_result: Callable[[str, Any, Exception | None], None] | None = None,
+        precomputed: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], dict[str, Exception]]:
+    """
+    Fetch what the agents declare and run each one as soon as its own inputs
+    have arrived, so CPU agents and LLM calls overlap with the remaining I/O.
+    A failed fetch only fails the agents that need it. Returns (results, errors)
+    as run_agents does, which also passes each outcome to `on_result` as it
+    arrives.
+
+    Requests are sized for every declared agent, not only the selected ones,
+    so their parameters do not depend on the selection; only the datasets the
+    selected agents consume are fetched.
+
+    With a process `pool` (see create_process_pool) every agent's analysis runs
+    in a worker instead of holding this process's GIL. Inputs are pickled,
+    except price arrays, which go through shared memory.
+
+    When the run journal is enabled, agents already recorded for (ticker,
+    end_date) with a matching fingerprint are reported from it without
+    running, only the datasets the other agents need are loaded (from the
+    journal where recorded, otherwise fetched and recorded), and each agent
+    that completes is recorded.
+
+    `precomputed` maps agent names to results produced outside the pipeline
+    (see run_technical_panel); those agents are reported as completed without
+    fetching their inputs.
+    """
+    agents = load_agents() if agents is None else agents
+    shared = pool is not None
+    # 请求按全部策略规划，只保留所选策略用到的数据集：请求参数与指纹不随 --agents 变化，
+    # 换一组策略续跑时已记录的数据和结果仍然有效
+    planned = plan_fetches(ticker, start_date, end_date, {**load_agents(), **agents}, shared)
+    fingerprints = {key: _fetch_fingerprint(fetch) for key, fetch in planned.items()}
+    agent_fingerprints = {
+        name: _agent_fingerprint(spec, [fingerprints[_dataset_key(agent_input, shared)] for agent_input in spec.inputs])
+        for name, spec in agents.items()
+    }
+
+    resumed: dict[str, Any] = {}
+    if run_journal.enabled:
+        for name, spec in agents.items():
+            result = run_journal.load_agent(ticker, end_date, name, agent_fingerprints[name])
+            if result is not MISSING:
+                resumed[name] = result
+                progress.update(spec.task, ProgressStatus.DONE, spec.task.chinese + "分析 已从断点恢复")
+                if on_result is not None:
+                    on_result(name, result, None)
+
+        def record(name: str, result: Any, error: Exception | None) -> None:
+            # LLM 回复无法解析时结果为 None，同失败一样下次重算
+            if error is None and result is not None:
+                run_journal.save_agent(ticker, end_date, name, agent_fingerprints[name], result)
+            if on_result is not None:
+                on_result(name, result, error)
+
+        on_finish = record
+    else:
+        on_finish = on_result
+
+    completed = dict(resumed)
+    for name, result in (precomputed or {}).items():
+        if name in agents and name not in completed:
+            completed[name] = result
+            task = agents[name].task
+            progress.update(task, ProgressStatus.DONE, task.chinese + "分析 已批量完成")
+            if on_finish is not None:
+                on_finish(name, result, None)
+    pending_agents = {name: spec for name, spec in agents.items() if name not in completed}
+    needed = {_dataset_key(agent_input, shared) for spec in pending_agents.values() for agent_input in spec.inputs}
+    fetches = {key: fetch for key, fetch in planned.items() if key in needed}
+    if run_journal.enabled:
+        fetches = {
+            key: functools.partial(run_journal.fetch, ticker, end_date, key, fingerprints[key], fetch)
+            for key, fetch in fetches.items()
+        }
+    if "price_columns" in fetches:
+        fetches["price_columns"] = lambda fetch=fetches["price_columns"]: SharedColumns.create(fetch())
+    if fetches:
+        progress.update(TaskName.PREPARE_DATA, ProgressStatus.WORKING, f"{ticker} 获取数据开始")
+    else:
+        # 批量阶段可能已为本只股票缓存了请求结果
+        request_memo.invalidate(ticker)
+        progress.update(TaskName.PREPARE_DATA, ProgressStatus.DONE, f"{ticker} 无需获取数据")
+
+    remaining = len(fetches)
+    remaining_lock = threading.Lock()
+
+    def fetched(_: Future) -> None:
+        nonlocal remaining
+        with remaining_lock:
+            remaining -= 1
+            if remaining:
+                return
+        # 数据全部到齐后释放本只股票的请求级缓存
+        request_memo.invalidate(ticker)
+        cache_stats = api_cache.stats()
+        rate_stats = api_rate_limiter.stats()
+        progress.update(TaskName.PREPARE_DATA, ProgressStatus.DONE,
+                        f"{ticker} 数据获取完成 (缓存命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']}, "
+                        f"限流 {rate_stats['throttled']} 次, 排队 {rate_stats['queue_depth']})")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"fetch-{ticker}") as executor:
+        futures = {key: executor.submit(fetch) for key, fetch in fetches.items()}
+        for future in futures.values():
+            future.add_done_callback(fetched)
+
+        inputs = {name: [futures[_dataset_key(agent_input, shared)] for agent_input in spec.inputs]
+                  for name, spec in pending_agents.items()}
+        tasks = {name: (spec.task, _agent_task(ticker, spec, inputs[name], pool))
+                 for name, spec in pending_agents.items()}
+        try:
+            results, errors = run_agents(tasks, dependencies=inputs, on_result=on_finish)
+            results.update(completed)
+            return {name: results[name] for name in agents if name in results}, errors
+        finally:
+            shared_columns = futures.get("price_columns")
+            if shared_columns is not None and shared_columns.exception() is None:
+                shared_columns.result().unlink()
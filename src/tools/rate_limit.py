@@ -0,0 +1,155 @@
+import collections
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Optional
+
+from tools.cache import DEFAULT_CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，令牌桶只在进程内共享
+    fcntl = None
+
+# 统计实际请求速率的时间窗口（秒）
+_RATE_WINDOW = 10.0
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Client-side throttle for one API: a token bucket (`rate` requests/sec,
+    bursts up to `burst`; rate <= 0 disables it) plus an adaptive concurrency
+    limit.
+
+    The bucket and any Retry-After pause live in a small state file guarded by
+    flock, so every worker process on the machine draws from the same budget.
+    Concurrency follows AIMD: each success raises the limit by 1/limit (about
+    +1 per round of requests), each 429/5xx halves it, never above
+    `max_concurrency` or below 1.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, state_path: Optional[str] = None):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.state_path = state_path
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.throttled = 0
+        self._cond = threading.Condition()
+        self._state_lock = threading.Lock()
+        self._local_state = {"tokens": float(burst), "updated": time.time(), "blocked_until": 0.0}
+        self._sent: collections.deque[float] = collections.deque()
+
+    @contextmanager
+    def _state(self) -> Iterator[dict]:
+        """Shared bucket state, read-modify-written under the thread lock and, if possible, a file lock."""
+        with self._state_lock:
+            if self.state_path is None or fcntl is None:
+                yield self._local_state
+                return
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "a+", encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                except ValueError:
+                    state = dict(self._local_state)
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+
+    def _try_take(self) -> float:
+        """Take one token if available; otherwise return how long to wait before trying again."""
+        with self._state() as state:
+            now = time.time()
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            if self.rate <= 0:
+                return 0.0
+            tokens = min(float(self.burst), state["tokens"] + (now - state["updated"]) * self.rate)
+            state["updated"] = now
+            if tokens >= 1:
+                state["tokens"] = tokens - 1
+                return 0.0
+            state["tokens"] = tokens
+            return (1 - tokens) / self.rate
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Wait for a concurrency slot and a token, then hold the slot for one request."""
+        with self._cond:
+            self.waiting += 1
+            while self.in_flight >= int(self.concurrency_limit):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            try:
+                while (wait := self._try_take()) > 0:
+                    time.sleep(min(wait, 1.0))
+            finally:
+                with self._cond:
+                    self.waiting -= 1
+            with self._cond:
+                self._sent.append(time.monotonic())
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.concurrency_limit = min(float(self.max_concurrency), self.concurrency_limit + 1 / self.concurrency_limit)
+            self._cond.notify_all()
+
+    def on_throttle(self, pause: Optional[float] = None) -> None:
+        """Back off after a 429/5xx; `pause` (e.g. from Retry-After) stops every process for that long."""
+        with self._cond:
+            self.throttled += 1
+            self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+        if pause:
+            with self._state() as state:
+                state["blocked_until"] = max(state["blocked_until"], time.time() + pause)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            while self._sent and self._sent[0] < now - _RATE_WINDOW:
+                self._sent.popleft()
+            return {
+                "rate_limit": self.rate,
+                "current_rate": len(self._sent) / _RATE_WINDOW,
+                "concurrency_limit": int(self.concurrency_limit),
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "throttled": self.throttled,
+            }
+
+
+api_rate_limiter = RateLimiter(
+    rate=float(os.getenv("QUANTAI_API_RATE", "10")),
+    burst=int(os.getenv("QUANTAI_API_BURST", "20")),
+    max_concurrency=int(os.getenv("QUANTAI_API_CONCURRENCY", "16")),
+    state_path=os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "ratelimit.json"),
+)
@@ -0,0 +1,74 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# object 列（如价格的 time 字符串）在共享内存中存为定长 ASCII 字节
+_OBJECT_DTYPE = "S32"
+
+
+class SharedColumns:
+    """
+    A dict of equal-length NumPy columns copied once into a single shared-memory
+    block. Only the block name and the layout are pickled, so sending it to a
+    worker process costs a few bytes regardless of the row count; the worker
+    copies the arrays out of the shared pages instead of unpickling them.
+
+    The creating process owns the block and must call unlink() when no worker
+    needs it any more.
+    """
+
+    def __init__(self, name: str, rows: int, layout: list[tuple[str, str, bool]]):
+        self.name = name
+        self.rows = rows
+        # (列名, 存储 dtype, 是否为 object 列)
+        self.layout = layout
+        self._shm: shared_memory.SharedMemory | None = None
+
+    @classmethod
+    def create(cls, columns: dict[str, np.ndarray]) -> "SharedColumns":
+        rows = len(next(iter(columns.values()))) if columns else 0
+        layout = []
+        stored = []
+        for name, column in columns.items():
+            is_object = column.dtype == object
+            array = column.astype(_OBJECT_DTYPE) if is_object else np.ascontiguousarray(column)
+            layout.append((name, array.dtype.str, is_object))
+            stored.append(array)
+        size = max(sum(array.nbytes for array in stored), 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        offset = 0
+        for array in stored:
+            shm.buf[offset:offset + array.nbytes] = array.tobytes()
+            offset += array.nbytes
+        handle = cls(shm.name, rows, layout)
+        handle._shm = shm
+        return handle
+
+    def __getstate__(self) -> dict:
+        return {"name": self.name, "rows": self.rows, "layout": self.layout}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def read(self) -> dict[str, np.ndarray]:
+        """Private copies of the columns (object columns decoded back to str)."""
+        # 工作进程由创建者的进程池派生，与创建者共用同一个 resource_tracker，附加时无需注销
+        shm = self._shm or shared_memory.SharedMemory(name=self.name)
+        try:
+            columns = {}
+            offset = 0
+            for name, dtype, is_object in self.layout:
+                view = np.ndarray((self.rows,), dtype=dtype, buffer=shm.buf, offset=offset)
+                offset += view.nbytes
+                columns[name] = view.astype(str).astype(object) if is_object else view.copy()
+                del view
+            return columns
+        finally:
+            if shm is not self._shm:
+                shm.close()
+
+    def unlink(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
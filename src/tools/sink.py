@@ -0,0 +1,52 @@
+import json
+import socket
+import sys
+import threading
+from typing import Any, TextIO
+
+
+class ResultSink:
+    """
+    JSON-lines writer shared by every ticker and agent thread. Each record is
+    written and flushed as soon as it is emitted, so consumers can act on a
+    result while the rest of the run is still going and nothing already
+    emitted is lost if the run dies.
+    """
+
+    def __init__(self, stream: TextIO, owned: bool = False, sock: socket.socket | None = None):
+        self.stream = stream
+        self._owned = owned
+        self._sock = sock
+        self._lock = threading.Lock()
+
+    def emit(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._owned:
+                self.stream.close()
+            if self._sock is not None:
+                self._sock.close()
+
+
+def open_sink(target: str | None = None) -> ResultSink:
+    """
+    Sink for `target`: None or "-" is stdout, "tcp://host:port" and
+    "unix:/path/to/socket" connect to a local listener, anything else is a
+    file that records are appended to.
+    """
+    if target in (None, "-"):
+        return ResultSink(sys.stdout)
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        sock = socket.create_connection((host or "127.0.0.1", int(port)))
+    elif target.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target[len("unix:"):])
+    else:
+        return ResultSink(open(target, "a", encoding="utf-8"), owned=True)
+    return ResultSink(sock.makefile("w", encoding="utf-8"), owned=True, sock=sock)
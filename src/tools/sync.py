@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Hashable, Optional
+
+from tools.cache import DEFAULT_CACHE_DIR
+
+# 各数据集的自然键，用于合并去重
+NATURAL_KEYS = {
+    "insider_trades": lambda row: (row.get("filing_date"), row.get("name"), row.get("transaction_shares")),
+    "news": lambda row: row.get("url"),
+}
+
+
+def _next_day(day: str) -> str:
+    return (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+
+
+def _previous_day(day: str) -> str:
+    return (datetime.date.fromisoformat(day) - datetime.timedelta(days=1)).isoformat()
+
+
+class IncrementalStore:
+    """
+    Local copy of append-mostly datasets (insider trades, news) per ticker, kept
+    in sync with watermarks instead of re-downloading the whole history.
+
+    Each (dataset, ticker) file holds the raw rows plus the date range
+    [low, high] known to be complete ("" as low means "from the beginning").
+    A request past `high` only fetches the delta from `high` on; a request
+    the stored range already answers costs no API call. Rows are merged by
+    NATURAL_KEYS, so overlapping pages never produce duplicates.
+    """
+
+    def __init__(self, directory: str, enabled: bool = True):
+        self.directory = directory
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def _path(self, dataset: str, ticker: str) -> str:
+        return os.path.join(self.directory, dataset, ticker.upper() + ".json")
+
+    def _load(self, dataset: str, ticker: str) -> Optional[dict]:
+        try:
+            with open(self._path(dataset, ticker), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save(self, dataset: str, ticker: str, state: dict) -> None:
+        path = self._path(dataset, ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def sync(
+            self,
+            dataset: str,
+            ticker: str,
+            date_field: str,
+            end_date: str,
+            start_date: Optional[str],
+            limit: int,
+            fetch: Callable[[str, Optional[str]], list[dict]],
+    ) -> list[dict]:
+        """
+        Rows dated within [start_date, end_date], newest first; without a
+        start_date only the newest `limit` rows, like a single API page.
+        `fetch(end_date, start_date)` runs the endpoint's normal pagination and
+        is only called for the parts of the range that are not stored yet.
+        """
+        key: Callable[[dict], Hashable] = NATURAL_KEYS[dataset]
+        day = lambda row: row[date_field][:10]
+        today = datetime.date.today().isoformat()
+
+        with self._lock:
+            state = self._load(dataset, ticker)
+        rows = {key(row): row for row in state["rows"]} if state else {}
+
+        def merge(fetched: list[dict]) -> None:
+            for row in fetched:
+                rows[key(row)] = row
+
+        def covered() -> bool:
+            if state is None or state["high"] < min(end_date, today) or end_date < state["low"]:
+                return False
+            if start_date is not None:
+                return start_date >= state["low"]
+            if state["low"] == "":
+                return True
+            # low 前一天只取到了最新的一部分，但它们正是排在前面的那些，可以计入
+            first_day = _previous_day(state["low"])
+            return sum(1 for row in rows.values() if first_day <= day(row) <= end_date) >= limit
+
+        if state is not None and state["low"] <= end_date and state["high"] < end_date:
+            # 水位线之后的增量：从上次同步到的日期（含当天）开始取
+            merge(fetch(end_date, state["high"]))
+            state["high"] = min(end_date, today)
+
+        refetched = False
+        while not covered():
+            # 已覆盖到 end_date 时只向前补取 low 之前的部分，否则整段重新取
+            backfill = state is not None and state["low"] != "" and state["low"] <= end_date \
+                and state["high"] >= min(end_date, today)
+            if not backfill:
+                if refetched:
+                    break
+                refetched = True
+            fetched = fetch(state["low"] if backfill else end_date, start_date)
+            merge(fetched)
+            if start_date is not None or len(fetched) < limit:
+                low = start_date or ""
+            else:
+                # 满页时最早那一天可能没取全，只认后一天起的数据是完整的
+                low = _next_day(min(day(row) for row in fetched))
+            high = min(end_date, today)
+            if state is not None and low <= _next_day(state["high"]) and state["low"] <= _next_day(high):
+                if backfill and low >= state["low"]:
+                    break  # 同一天的数据超过一页，无法再推进
+                low, high = min(low, state["low"]), max(high, state["high"])
+            state = {"low": low, "high": high}
+
+        state["rows"] = sorted(rows.values(), key=lambda row: row[date_field], reverse=True)
+        with self._lock:
+            self._save(dataset, ticker, state)
+
+        result = [row for row in state["rows"] if (start_date or "") <= day(row) <= end_date]
+        return result if start_date else result[:limit]
+
+
+incremental_store = IncrementalStore(
+    directory=os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "sync"),
+    enabled=os.getenv("QUANTAI_INCREMENTAL_SYNC", "1").lower() not in ("0", "false", "no"),
+)
@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator
+
+from utils.ProgressBar import progress, ProgressStatus, TaskName
+
+TICKER_CONCURRENCY = int(os.getenv("QUANTAI_TICKER_CONCURRENCY", "4"))
+
+
+def load_tickers(tickers: str | None = None, tickers_file: str | None = None) -> Iterator[str]:
+    """
+    Tickers from a comma separated list and/or a file with one symbol per line
+    ('#' starts a comment). Read lazily, duplicates are skipped.
+    """
+    seen = set()
+
+    def lines() -> Iterator[str]:
+        if tickers:
+            yield from tickers.split(",")
+        if tickers_file:
+            with open(tickers_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield line.split("#", 1)[0]
+
+    for raw in lines():
+        ticker = raw.strip().upper()
+        if ticker and ticker not in seen:
+            seen.add(ticker)
+            yield ticker
+
+
+def run_universe(
+        tickers: Iterable[str],
+        analyze: Callable[[str], dict[str, Any]],
+        emit: Callable[[dict[str, Any]], None],
+        max_workers: int = TICKER_CONCURRENCY,
+) -> int:
+    """
+    Analyze tickers with at most `max_workers` in flight and pass each ticker's
+    record (what `analyze` returned, or its error) to `emit`, e.g.
+    ResultSink.emit, as soon as it finishes. Tickers are pulled from the
+    iterable only when a slot frees up, so memory does not grow with the
+    universe size. Returns the number of tickers processed.
+    """
+    tickers = iter(tickers)
+    pending = {}
+    finished = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ticker") as executor:
+        def submit_next() -> None:
+            ticker = next(tickers, None)
+            if ticker is not None:
+                pending[executor.submit(analyze, ticker)] = ticker
+
+        for _ in range(max_workers):
+            submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"type": "ticker", "ticker": ticker, "error": str(e)}
+                emit(result)
+                finished += 1
+                progress.update(TaskName.UNIVERSE, ProgressStatus.WORKING, f"已完成 {finished} 只股票 (最新: {ticker})")
+                submit_next()
+
+    progress.update(TaskName.UNIVERSE, ProgressStatus.DONE, f"全部完成，共 {finished} 只股票")
+    return finished
@@ -0,0 +1,235 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Callable, Iterator
+
+import numpy as np
+
+from tools.cache import DEFAULT_CACHE_DIR, last_closed_day
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只做进程内加锁
+    fcntl = None
+
+# 价格列及其内存中的类型；time 在磁盘上存为定长 ASCII 字节，便于映射和二分查找
+PRICE_COLUMNS = {"open": np.float64, "close": np.float64, "high": np.float64, "low": np.float64,
+                 "volume": np.int64, "time": object}
+DISK_DTYPES = {"open": "<f8", "close": "<f8", "high": "<f8", "low": "<f8", "volume": "<i8", "time": "S32"}
+
+
+def price_columns_from_rows(rows: list[dict]) -> dict[str, np.ndarray]:
+    """Split /prices/ rows into typed columns in one pass."""
+    names = list(PRICE_COLUMNS)
+    columns = list(zip(*map(itemgetter(*names), rows))) if rows else [()] * len(names)
+    return {name: np.array(values, dtype=PRICE_COLUMNS[name]) for name, values in zip(names, columns)}
+
+
+def price_rows_from_columns(columns: dict[str, np.ndarray]) -> list[dict]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name].tolist() for name in names))]
+
+
+def _next_day(day: str) -> str:
+    return (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+
+
+def _previous_day(day: str) -> str:
+    return (datetime.date.fromisoformat(day) - datetime.timedelta(days=1)).isoformat()
+
+
+def _last_weekday(day: str) -> str:
+    date = datetime.date.fromisoformat(day)
+    while date.weekday() >= 5:
+        date -= datetime.timedelta(days=1)
+    return date.isoformat()
+
+
+class PriceWarehouse:
+    """
+    Local append-only store of daily bars, one directory per ticker holding a
+    raw little-endian file per column plus meta.json (row count, generation and
+    the date ranges already fetched). Rows are kept sorted by time.
+
+    Reads memory-map the column files read-only and return slices of the maps,
+    so any number of processes can share the same pages without copying. Only
+    the date gaps not yet covered are fetched from the API. New bars after the
+    last stored one are appended in place; back-fills write a new generation
+    of files and switch meta.json to it atomically. Only exchange days that are
+    closed and published (tools.cache.last_closed_day) are stored, and the
+    last one only counts as covered once its bar has actually come back.
+    """
+
+    def __init__(self, directory: str, enabled: bool = True):
+        self.directory = directory
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.directory, ticker.upper())
+
+    def _column_path(self, ticker: str, name: str, generation: int) -> str:
+        return os.path.join(self._ticker_dir(ticker), f"{name}.{generation}.bin")
+
+    def _read_meta(self, ticker: str) -> dict:
+        try:
+            with open(os.path.join(self._ticker_dir(ticker), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"rows": 0, "generation": 0, "covered": []}
+
+    def _write_meta(self, ticker: str, meta: dict) -> None:
+        directory = self._ticker_dir(ticker)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+    @contextmanager
+    def _write_lock(self, ticker: str) -> Iterator[None]:
+        """Serialize writers to one ticker across threads and, where fcntl exists, processes."""
+        os.makedirs(self._ticker_dir(ticker), exist_ok=True)
+        with self._lock, open(os.path.join(self._ticker_dir(ticker), ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _map(self, ticker: str, meta: dict) -> dict[str, np.ndarray]:
+        rows = meta["rows"]
+        if rows == 0:
+            return {name: np.empty(0, dtype=DISK_DTYPES[name]) for name in DISK_DTYPES}
+        return {
+            name: np.memmap(self._column_path(ticker, name, meta["generation"]), dtype=dtype, mode="r", shape=(rows,))
+            for name, dtype in DISK_DTYPES.items()
+        }
+
+    def read(self, ticker: str, start_date: str, end_date: str) -> dict[str, np.ndarray]:
+        """
+        Stored bars with start_date <= date <= end_date as read-only views of
+        the mapped files (`time` stays as ASCII bytes).
+        """
+        for attempt in range(2):
+            meta = self._read_meta(ticker)
+            try:
+                columns = self._map(ticker, meta)
+                break
+            except FileNotFoundError:
+                # 读到旧 meta 时旧文件恰好被新一代替换，重读一次即可
+                if attempt:
+                    raise
+        times = columns["time"]
+        lo = np.searchsorted(times, start_date.encode("ascii"), side="left")
+        hi = np.searchsorted(times, _next_day(end_date).encode("ascii"), side="left")
+        return {name: column[lo:hi] for name, column in columns.items()}
+
+    def missing(self, ticker: str, start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """Date ranges inside [start_date, end_date] that have never been fetched."""
+        gaps = []
+        cursor = start_date
+        for covered_start, covered_end in self._read_meta(ticker)["covered"]:
+            if cursor > end_date:
+                break
+            if covered_end < cursor:
+                continue
+            if covered_start > cursor:
+                gaps.append((cursor, min(_previous_day(covered_start), end_date)))
+            cursor = max(cursor, _next_day(covered_end))
+        if cursor <= end_date:
+            gaps.append((cursor, end_date))
+        return gaps
+
+    def store(self, ticker: str, start_date: str, end_date: str, rows: list[dict]) -> None:
+        """Add fetched bars for [start_date, end_date] and mark the range as covered."""
+        columns = price_columns_from_rows(rows)
+        with self._write_lock(ticker):
+            meta = self._read_meta(ticker)
+            stored = self._map(ticker, meta)
+            new_times = columns["time"].astype(DISK_DTYPES["time"])
+            if any(len(value) > 32 for value in columns["time"]):
+                raise ValueError(f"Unexpected price timestamp format for {ticker}")
+
+            if len(new_times) == 0:
+                pass
+            elif meta["rows"] == 0 or (np.all(new_times[1:] > new_times[:-1]) and new_times[0] > stored["time"][-1]):
+                self._append(ticker, meta, columns)
+            else:
+                self._rewrite(ticker, meta, stored, columns)
+
+            meta["covered"] = self._merge_covered(meta["covered"] + [[start_date, end_date]])
+            self._write_meta(ticker, meta)
+
+    def _append(self, ticker: str, meta: dict, columns: dict[str, np.ndarray]) -> None:
+        for name, dtype in DISK_DTYPES.items():
+            path = self._column_path(ticker, name, meta["generation"])
+            with open(path, "ab") as f:
+                # 截掉上次写入中断时留下的半截数据，再追加
+                f.truncate(meta["rows"] * np.dtype(dtype).itemsize)
+                f.write(columns[name].astype(dtype).tobytes())
+        meta["rows"] += len(columns["time"])
+
+    def _rewrite(self, ticker: str, meta: dict, stored: dict[str, np.ndarray], columns: dict[str, np.ndarray]) -> None:
+        merged = {name: np.concatenate([columns[name].astype(dtype), stored[name]]) for name, dtype in DISK_DTYPES.items()}
+        # 新数据在前，去重时保留新数据
+        _, first = np.unique(merged["time"], return_index=True)
+        old_generation, generation = meta["generation"], meta["generation"] + 1
+        for name in DISK_DTYPES:
+            with open(self._column_path(ticker, name, generation), "wb") as f:
+                f.write(merged[name][first].tobytes())
+        meta.update(rows=len(first), generation=generation)
+        # 旧文件只在 meta 切换之后删除；已映射的读者不受影响
+        self._write_meta(ticker, meta)
+        for name in DISK_DTYPES:
+            try:
+                os.remove(self._column_path(ticker, name, old_generation))
+            except OSError:
+                # Windows 上仍被映射的文件删除会报 PermissionError；meta 已切换，残留的旧文件不影响读取
+                pass
+
+    @staticmethod
+    def _merge_covered(ranges: list[list[str]]) -> list[list[str]]:
+        merged: list[list[str]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= _next_day(merged[-1][1]):
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def get(self, ticker: str, start_date: str, end_date: str,
+            fetch: Callable[[str, str], list[dict]]) -> dict[str, np.ndarray]:
+        """
+        Bars for [start_date, end_date], fetching only the uncovered gaps with
+        `fetch(start, end)`. Stored data comes back as mapped views; bars after
+        the last closed exchange day are fetched every time and appended to the
+        result.
+        """
+        closed = last_closed_day()
+        fresh = []
+        for gap_start, gap_end in self.missing(ticker, start_date, min(end_date, closed)):
+            rows = fetch(gap_start, gap_end)
+            if gap_end == closed:
+                # 最近一个交易日的数据可能还没发布，没取到时这一天不算已覆盖，下次重新取
+                session = _last_weekday(closed)
+                if not any(row["time"][:10] >= session for row in rows):
+                    gap_end = _previous_day(session)
+            if gap_start <= gap_end:
+                self.store(ticker, gap_start, gap_end, rows)
+        if end_date > closed:
+            fresh = [row for row in fetch(max(start_date, _next_day(closed)), end_date) if row["time"][:10] > closed]
+
+        columns = self.read(ticker, start_date, end_date)
+        columns["time"] = columns["time"].astype(str).astype(object)
+        if fresh:
+            recent = price_columns_from_rows(fresh)
+            columns = {name: np.concatenate([columns[name], recent[name]]) for name in PRICE_COLUMNS}
+        return columns
+
+
+price_warehouse = PriceWarehouse(
+    directory=os.path.join(os.getenv("QUANTAI_CACHE_DIR", DEFAULT_CACHE_DIR), "prices"),
+    enabled=os.getenv("QUANTAI_PRICE_WAREHOUSE", "1").lower() not in ("0", "false", "no"),
+)
@@ -1,4 +1,5 @@
 # progress_bar.py
+import threading
 from typing import Dict
 from rich.console import Console
 from rich.live import Live
@@ -30,6 +31,7 @@ class TaskName(Enum):
     BILL_ACKMAN = ("Bill Ackman", "比尔·阿克曼策略")
     TECHNICAL_ANALYST = ("technical_analyst", "技术分析")
     PREPARE_DATA = ("Prepare data", "准备数据")
+    UNIVERSE = ("Universe", "股票池")
 
     def __init__(self, english: str, chinese: str):
         self.english = english
@@ -49,11 +51,13 @@ class ProgressBar:
 
 class MultiProgressBar:
     def __init__(self):
-        self.console = Console()
+        # 进度显示走 stderr，stdout 只留给 JSON lines 结果
+        self.console = Console(stderr=True)
         self.tasks: Dict[str, ProgressBar] = {}
         self.table = Table(show_header=False, box=None)
         self.live = Live(self.table, console=self.console, refresh_per_second=5)
         self.started = False
+        self._lock = threading.Lock()  # 多个策略并发执行时会同时更新进度
 
     def start(self):
         if not self.started:
@@ -66,10 +70,11 @@ class MultiProgressBar:
             self.started = False
 
     def update(self, task_name: TaskName, status: ProgressStatus, message: str = ""):
-        if task_name not in self.tasks:
-            self.tasks[task_name.english] = ProgressBar(task_name.english)
-        self.tasks[task_name.english].set_status(status, message)
-        self._refresh()
+        with self._lock:
+            if task_name.english not in self.tasks:
+                self.tasks[task_name.english] = ProgressBar(task_name.english)
+            self.tasks[task_name.english].set_status(status, message)
+            self._refresh()
 
     def _refresh(self):
         self.table.columns.clear()